@@ -0,0 +1,134 @@
+"""Measure the search speed of `AlphaBetaPlayer` configurations on a fixed set
+of positions.
+
+The time-to-depth benchmark times iterative deepening to a fixed depth with
+the single-process search and with the root moves split across 2, 4 and 8
+worker processes, and reports the speedup of each over the single process.
+The speedup is bounded by the number of cores of the machine.
+
+The heuristic benchmark compares `custom_score` with the reachable-area
+heuristic at several depths: the cost of one uncached call, and the mean
+depth that `AlphaBetaPlayer` completes with each of them in the time
+limit of a tournament move.
+"""
+import random
+
+from timeit import default_timer
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, AreaEvaluator, custom_score
+
+NUM_POSITIONS = 5  # number of benchmark positions
+OPENING_PLIES = 4  # random moves played to reach each position
+SEARCH_DEPTH = 10  # depth to which time-to-depth is measured
+WORKER_COUNTS = [2, 4, 8]
+RANDOM_SEED = 0
+HEURISTIC_POSITIONS = 20  # number of positions the heuristics are timed on
+HEURISTIC_PLIES = 10  # random moves played to reach each of them
+TIME_LIMIT = 150  # milliseconds per move of the depth comparison
+HEURISTICS = [
+    ("custom_score", lambda: custom_score),
+    ("area depth 2", lambda: AreaEvaluator(depth=2)),
+    ("area depth 3", lambda: AreaEvaluator(depth=3)),
+    ("area full", lambda: AreaEvaluator(depth=None)),
+]
+
+
+def benchmark_positions(num_positions=NUM_POSITIONS, plies=OPENING_PLIES, seed=RANDOM_SEED):
+    """Return snapshots of positions reached by playing random moves from the
+    empty 7x7 board.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Board("player 1", "player 2", seed=rng.getrandbits(64))
+        for _ in range(plies):
+            if not game.get_legal_moves():
+                break
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        if game.get_legal_moves():
+            positions.append(game.snapshot())
+    return positions
+
+
+def time_to_depth(player, snapshot, depth):
+    """Return the seconds player takes to complete every iterative-deepening
+    iteration up to depth from the position in snapshot.
+    """
+    players = ("opponent", player) if snapshot.initiative else (player, "opponent")
+    game = Board.from_snapshot(snapshot, *players)
+    player.time_left = lambda: 1e9
+    player._pv, player._pv_keys, player.root_score = [], [], None
+    start = default_timer()
+    for d in range(1, depth + 1):
+        player._search_depth(game, d, parallel=player.workers > 1)
+        player._save_pv(game)
+    return default_timer() - start
+
+
+def cost_per_call(score_fn, positions, repeat=100):
+    """Return the mean microseconds of a call to score_fn on the positions
+    in snapshots, building a new score_fn for every pass so that cached
+    values are not reused.
+    """
+    games = [Board.from_snapshot(snapshot, "player 1", "player 2") for snapshot in positions]
+    elapsed = 0.
+    for _ in range(repeat):
+        score = score_fn()
+        start = default_timer()
+        for game in games:
+            score(game, game.active_player)
+        elapsed += default_timer() - start
+    return 1e6 * elapsed / (repeat * len(games))
+
+
+def depth_reached(score_fn, positions, time_limit=TIME_LIMIT):
+    """Return the mean depth an `AlphaBetaPlayer` scoring with score_fn
+    completes on the positions in snapshots in time_limit milliseconds.
+    """
+    player = AlphaBetaPlayer(score_fn=score_fn(), endgame_cells=0)
+    depths = []
+    for snapshot in positions:
+        players = ("opponent", player) if snapshot.initiative else (player, "opponent")
+        game = Board.from_snapshot(snapshot, *players)
+        deadline = 1000 * default_timer() + time_limit
+        player.get_move(game, lambda: deadline - 1000 * default_timer())
+        depths.append(player.stats.depth)
+    return sum(depths) / len(depths)
+
+
+def benchmark_heuristics():
+    positions = benchmark_positions(HEURISTIC_POSITIONS, HEURISTIC_PLIES)
+    print("Heuristics over {} positions, {} ms per move".format(len(positions), TIME_LIMIT))
+    print("{:>14} {:>10} {:>8}".format("heuristic", "us/call", "depth"))
+    for name, score_fn in HEURISTICS:
+        print("{:>14} {:>10.2f} {:>8.2f}".format(
+            name, cost_per_call(score_fn, positions), depth_reached(score_fn, positions)))
+
+
+def benchmark_parallel_search():
+    positions = benchmark_positions()
+    print("Time to depth {} over {} positions".format(SEARCH_DEPTH, len(positions)))
+    serial = sum(time_to_depth(AlphaBetaPlayer(endgame_cells=0), snapshot, SEARCH_DEPTH)
+                 for snapshot in positions)
+    print("{:>8} {:>10} {:>8}".format("workers", "seconds", "speedup"))
+    print("{:>8} {:>10.3f} {:>8.2f}".format(1, serial, 1.))
+    for workers in WORKER_COUNTS:
+        player = AlphaBetaPlayer(endgame_cells=0, workers=workers)
+        try:
+            # Start the pool before timing: it is started once per player
+            player._worker_pool()
+            elapsed = sum(time_to_depth(player, snapshot, SEARCH_DEPTH) for snapshot in positions)
+        finally:
+            player.close()
+        print("{:>8} {:>10.3f} {:>8.2f}".format(workers, elapsed, serial / elapsed))
+
+
+def main():
+    benchmark_parallel_search()
+    print()
+    benchmark_heuristics()
+
+
+if __name__ == "__main__":
+    main()
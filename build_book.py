@@ -0,0 +1,82 @@
+"""Build an opening book for `AlphaBetaPlayer` by searching the first plies
+of the game offline, far longer than the time limit of a real move.
+
+The book covers the positions on a book line of either player: the player
+whose book it is plays the book move, and every reply of the opponent is
+expanded. The result is written with `OpeningBook.write` and can be used
+with `AlphaBetaPlayer(book=OpeningBook(BOOK_FILE))`.
+"""
+from timeit import default_timer
+
+from isolation import Board
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer, OpeningBook, TranspositionTable, custom_score
+
+BOOK_FILE = "opening_book.bin"
+BOOK_PLIES = 3  # positions with fewer moves played than this are in the book
+SEARCH_TIME = 1000  # milliseconds of search for each book position
+WIDTH = 7
+HEIGHT = 7
+
+
+def opening_score(game, player):
+    """Score positions with custom_score once both players are placed, and
+    with improved_score (which allows unplaced players) before that.
+    """
+    if None in (game.get_player_location(game.active_player),
+                game.get_player_location(game.inactive_player)):
+        return improved_score(game, player)
+    return custom_score(game, player)
+
+
+def search_move(game, time_limit):
+    """Return the move an `AlphaBetaPlayer` finds for the player to move in
+    game with time_limit milliseconds of iterative deepening.
+    """
+    player = AlphaBetaPlayer(score_fn=opening_score, tt=TranspositionTable(1 << 20),
+                             endgame_cells=0)
+    players = (player, "opponent") if game.move_count % 2 == 0 else ("opponent", player)
+    board = Board.from_snapshot(game.snapshot(), *players)
+    deadline = 1000 * default_timer() + time_limit
+    return player.get_move(board, lambda: deadline - 1000 * default_timer())
+
+
+def build_book(width=WIDTH, height=HEIGHT, plies=BOOK_PLIES, time_limit=SEARCH_TIME):
+    """Search every book position and return a dict mapping the canonical
+    key of each one to its book move on the canonical board. Symmetric
+    positions are only searched once.
+    """
+    book = {}
+    # Positions of the current ply by canonical key, with the players (0 for
+    # player 1 and 1 for player 2) on whose book line they are
+    frontier = {0: (Board("player 1", "player 2", width, height), {0, 1})}
+    for ply in range(plies):
+        successors = {}
+        for key, (game, sides) in frontier.items():
+            mover = game.move_count % 2
+            moves = game.get_legal_moves()
+            children = []
+            if mover in sides:
+                move = search_move(game, time_limit)
+                _, transform = game.canonical()
+                book[key] = game.transform_move(move, transform)
+                children.append((move, mover))
+            if 1 - mover in sides:
+                children.extend((move, 1 - mover) for move in moves)
+            for move, side in children:
+                child = game.forecast_move(move)
+                successors.setdefault(child.canonical()[0], (child, set()))[1].add(side)
+        print("Ply {}: {} positions searched".format(ply, sum(
+            game.move_count % 2 in sides for game, sides in frontier.values())), flush=True)
+        frontier = successors
+    return book
+
+
+def main():
+    book = build_book()
+    OpeningBook.write(BOOK_FILE, WIDTH, HEIGHT, book)
+    print("Wrote {} positions to {}".format(len(book), BOOK_FILE))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,14 @@ champions) in a tournament.
 
          COMPLETING AND SUBMITTING A COMPETITION AGENT IS OPTIONAL
 """
+import math
 import random
 
+INF = float("inf")
+
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2), (1, 2), (2, -1), (2, 1)]
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -18,6 +24,10 @@ def custom_score(game, player):
 
     This should be the best heuristic function for your project submission.
 
+    The score is the player's number of legal moves minus twice the
+    opponent's, which favors positions that hem the opponent in. CustomPlayer
+    plays the best move by this score when there is no time to search.
+
     Parameters
     ----------
     game : `isolation.Board`
@@ -33,7 +43,67 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    raise NotImplementedError
+    if game.is_loser(player):
+        return -INF
+
+    if game.is_winner(player):
+        return INF
+
+    own_moves, opp_moves = game.count_mobility(player)
+    return float(own_moves - 2 * opp_moves)
+
+
+_KNIGHT_MASKS = {}
+
+
+def _knight_masks(width, height):
+    """Return, for each cell index (row + column * height) of a width x
+    height board, the bitmask of the cells a knight can jump to from it.
+    """
+    try:
+        return _KNIGHT_MASKS[(width, height)]
+    except KeyError:
+        masks = []
+        for idx in range(width * height):
+            r, c = idx % height, idx // height
+            mask = 0
+            for dr, dc in KNIGHT_DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << (r + dr + (c + dc) * height)
+            masks.append(mask)
+        _KNIGHT_MASKS[(width, height)] = masks
+        return masks
+
+
+def _bits(mask):
+    """Return the indices of the bits set in mask."""
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+class _Node(object):
+    """Node of the MCTS tree.
+
+    The game state is not stored: it follows from the moves on the path from
+    the root. `side` is the player (0 for player 1, 1 for player 2) who made
+    `move` (a cell index) to reach the node, and `wins` counts the playouts
+    through the node that this player won. Nodes don't point back to their
+    parent, so a discarded subtree is freed at once instead of being left
+    to the cyclic garbage collector, whose pauses could overrun the clock.
+    """
+    __slots__ = ("move", "side", "children", "untried", "wins", "visits")
+
+    def __init__(self, move, side, untried):
+        self.move = move
+        self.side = side
+        self.children = []
+        self.untried = untried
+        self.wins = 0
+        self.visits = 0
 
 
 class CustomPlayer:
@@ -49,6 +119,12 @@ class CustomPlayer:
         COMPETITION.  IT IS NOT REQUIRED FOR THE ISOLATION PROJECT REVIEW.
     **************************************************************************
 
+    This player runs Monte Carlo tree search with the UCT selection rule
+    until the time runs out, and plays the most visited move. Playouts are
+    uniformly random and run on integer bitmasks rather than `Board`
+    objects. The tree is kept between moves: the next search starts from the
+    subtree of the moves actually played, when it is known.
+
     Parameters
     ----------
     data : string
@@ -59,12 +135,29 @@ class CustomPlayer:
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
+
+    exploration : float (optional)
+        UCT exploration constant; higher values spread the playouts more
+        evenly over the moves.
+
+    seed : int (optional)
+        Seed of the playout random number generator.
     """
 
-    def __init__(self, data=None, timeout=1.):
+    def __init__(self, data=None, timeout=1., exploration=math.sqrt(2), seed=None):
         self.score = custom_score
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.exploration = exploration
+        self._rng = random.Random(seed)
+
+        # Search tree, and the state of its root (blocked cells, player
+        # locations and side to move) to recognize it on the next move
+        self._root = None
+        self._root_state = None
+        # Number of playouts of the last search, per second of search
+        self.playouts = 0
+        self.playouts_per_second = 0.
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +186,112 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+
+        snapshot = game.snapshot()
+        state = (snapshot.blocked, (snapshot.p1_location, snapshot.p2_location),
+                 snapshot.initiative)
+        knight = _knight_masks(game.width, game.height)
+        full = (1 << (game.width * game.height)) - 1
+        root = self._reuse_tree(state, knight, full)
+
+        start = time_left()
+        self.playouts = 0
+        try:
+            while True:
+                self._search(root, state, knight, full)
+                self.playouts += 1
+        except SearchTimeout:
+            pass
+        elapsed = start - time_left()
+        self.playouts_per_second = 1000. * self.playouts / elapsed if elapsed > 0 else 0.
+
+        if not root.children:
+            # No time to search: fall back on the heuristic
+            return max(legal_moves, key=lambda m: self.score(game.forecast_move(m), self))
+        best = max(root.children, key=lambda child: child.visits)
+        self._root, self._root_state = best, self._play(state, best.move)
+        return (best.move % game.height, best.move // game.height)
+
+    def _reuse_tree(self, state, knight, full):
+        """Return the node of the kept tree for state (the root's state after
+        our move and the opponent's reply), or a new root if there is none.
+        """
+        if self._root is not None:
+            blocked, locations, side = self._root_state
+            # The opponent's reply is its new location
+            reply = state[1][side]
+            for child in self._root.children:
+                if child.move == reply and self._play(self._root_state, reply) == state:
+                    return child
+        self._root, self._root_state = None, None
+        return _Node(None, 1 - state[2], self._moves(state, knight, full))
+
+    @staticmethod
+    def _moves(state, knight, full):
+        """Return the legal moves (cell indices) of the player to move."""
+        blocked, locations, side = state
+        idx = locations[side]
+        if idx is None:
+            return _bits(full & ~blocked)
+        return _bits(knight[idx] & ~blocked)
+
+    @staticmethod
+    def _play(state, move):
+        """Return the state after the player to move moves to cell move."""
+        blocked, locations, side = state
+        locations = (move, locations[1]) if side == 0 else (locations[0], move)
+        return (blocked | 1 << move, locations, 1 - side)
+
+    def _search(self, root, state, knight, full):
+        """Run one selection, expansion, playout and backup from root."""
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+        # Selection: descend through fully expanded nodes by UCT
+        node = root
+        path = [root]
+        log = math.log
+        sqrt = math.sqrt
+        c = self.exploration
+        while not node.untried and node.children:
+            log_visits = log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits +
+                       c * sqrt(log_visits / child.visits))
+            state = self._play(state, node.move)
+            path.append(node)
+
+        # Expansion: add one untried move
+        if node.untried:
+            move = node.untried.pop(self._rng.randrange(len(node.untried)))
+            state = self._play(state, move)
+            child = _Node(move, 1 - state[2], self._moves(state, knight, full))
+            node.children.append(child)
+            path.append(child)
+
+        # Playout, then credit every node whose mover won
+        winner = self._playout(state, knight, full)
+        for node in path:
+            node.visits += 1
+            if node.side == winner:
+                node.wins += 1
+
+    def _playout(self, state, knight, full):
+        """Play random moves from state to the end of the game and return
+        the winning side.
+        """
+        blocked, (p1, p2), side = state
+        locations = [p1, p2]
+        choice = self._rng.choice
+        while True:
+            idx = locations[side]
+            moves = (full if idx is None else knight[idx]) & ~blocked
+            if not moves:
+                return 1 - side
+            move = choice(_bits(moves))
+            blocked |= 1 << move
+            locations[side] = move
+            side = 1 - side
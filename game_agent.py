@@ -2,8 +2,56 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; custom_score_batch falls back to custom_score
+    np = None
+
+try:
+    from math import nextafter
+except ImportError:  # Python < 3.9
+    import sys
+
+    def nextafter(x, y):
+        """Return the next float after x towards y (approximately)."""
+        if x == y:
+            return y
+        if x in (INF, -INF):
+            return sys.float_info.max if x < y else -sys.float_info.max
+        step = max(abs(x), sys.float_info.min) * sys.float_info.epsilon
+        return x + step if x < y else x - step
+
 INF = float("inf")
 
+# Most blank cells for which a partitioned position is solved with an
+# exhaustive longest-path search (a few ms at worst on a 7x7 board)
+PARTITION_SOLVE_CELLS = 18
+
+# Weights of custom_score, estimated with Spearmint (see custom_score)
+SPEARMINT_WEIGHTS = {
+    "w_my_moves": -8.82446,                 # Weight for my moves
+    "w_opponent_moves": 1.6687,             # Weight for opponent moves
+    "w_center_distance": 7.99194,           # Weight for distance to the center of the board
+    "w_opponent_center_distance": 8.82935,  # Weight for opponent's distance to the center of the board
+    "w_opponent_distance": -9.96948,        # Weight for the distance to the opponent
+    "w_chase_opponent_factor": -3.33862,    # Extra boost used when the distance to the opponent is 3
+}
+
+# Folded into transposition table keys when the searching player moves second,
+# so a table reused across games never mixes up the two perspectives
+_TT_PLAYER_2_KEY = 0x9E3779B97F4A7C15
+
+# Statistics of the search for one move: the nodes searched and the leaves
+# evaluated, the deepest completed depth (0 when the move was not searched
+# for), the nodes per second, the beta cutoffs, the milliseconds taken by
+# each completed iteration and the milliseconds left when the move was
+# returned
+SearchStats = namedtuple("SearchStats", ["nodes", "leaves", "depth", "nps", "cutoffs",
+                                         "iteration_times", "time_left"])
+
+
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
     pass
@@ -36,8 +84,9 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    own_moves = game.get_legal_moves()
-    if len(own_moves) == 0:
+    # Count the moves of both players in one pass instead of building lists
+    own_moves, inactive_moves = game.count_mobility()
+    if own_moves == 0:
         # terminal state. We don't use the Isolation.Board builtin functions for the sake of
         # efficiency (no need to recalculate the list of legal moves)
         if player == game.active_player:
@@ -48,7 +97,7 @@ def custom_score(game, player):
             return INF
     else:
         opponent = game.get_opponent(player)
-        opp_moves = game.get_legal_moves(opponent)
+        opp_moves = own_moves if opponent == game.active_player else inactive_moves
         # Distance to the center of the board
         w, h = game.width / 2., game.height / 2.
         my_y, my_x = game.get_player_location(player)
@@ -64,15 +113,15 @@ def custom_score(game, player):
 
         # Weights for the different parameters of the heuristic.
         # They have been calculated using Spearmint (see function help for more info)
-        w_my_moves = -8.82446  # Weight for my moves
-        w_opponent_moves = 1.6687 # Weight for opponent moves
-        w_center_distance = 7.99194  # Weight for distance to the center of the board
-        w_opponent_center_distance = 8.82935  # Weight for opponent's distance to the center of the board
-        w_opponent_distance = -9.96948     # Weight for the distance to the opponent
-        w_chase_opponent_factor = -3.33862 # Extra boost used when the distance to the opponent is 3
-
-        d = len(own_moves) * w_my_moves \
-            - len(opp_moves) * w_opponent_moves \
+        w_my_moves = SPEARMINT_WEIGHTS["w_my_moves"]
+        w_opponent_moves = SPEARMINT_WEIGHTS["w_opponent_moves"]
+        w_center_distance = SPEARMINT_WEIGHTS["w_center_distance"]
+        w_opponent_center_distance = SPEARMINT_WEIGHTS["w_opponent_center_distance"]
+        w_opponent_distance = SPEARMINT_WEIGHTS["w_opponent_distance"]
+        w_chase_opponent_factor = SPEARMINT_WEIGHTS["w_chase_opponent_factor"]
+
+        d = own_moves * w_my_moves \
+            - opp_moves * w_opponent_moves \
             - center_distance * w_center_distance \
             + opp_center_distance * w_opponent_center_distance \
             - opp_distance * w_opponent_distance
@@ -84,6 +133,322 @@ def custom_score(game, player):
 
         return d
 
+_BATCH_TABLES = {}
+
+
+def _batch_tables(width, height):
+    """Return NumPy lookup tables (knight attack masks, bits, rows, columns
+    and center distances of every cell) for a board of the given size, built
+    once per size.
+    """
+    try:
+        return _BATCH_TABLES[(width, height)]
+    except KeyError:
+        cells = np.arange(width * height)
+        rows, cols = cells % height, cells // height
+        knight = np.zeros(width * height, dtype=np.uint64)
+        for dr, dc in [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]:
+            r, c = rows + dr, cols + dc
+            valid = (r >= 0) & (r < height) & (c >= 0) & (c < width)
+            knight[valid] |= np.left_shift(np.uint64(1), (r + c * height)[valid].astype(np.uint64))
+        bits = np.left_shift(np.uint64(1), cells.astype(np.uint64))
+        rows, cols = rows.astype(float), cols.astype(float)
+        center = abs(height / 2. - rows) + abs(width / 2. - cols)
+        tables = _BATCH_TABLES[(width, height)] = (knight, bits, rows, cols, center)
+        return tables
+
+
+def _popcount64(masks):
+    """Count the bits set in each element of a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    bits = np.unpackbits(masks.view(np.uint8)).reshape(len(masks), 64)
+    return bits.sum(axis=1)
+
+
+def custom_score_batch(game, player, moves):
+    """Evaluate with custom_score every child reached by the active player
+    playing one of `moves`, in one vectorized NumPy call.
+
+    The children are encoded as arrays of blocked-cell masks and player
+    locations, and the mobility, center distance and opponent distance
+    features are computed for the whole batch at once. The result is equal
+    to `[custom_score(game.forecast_move(m), player) for m in moves]`, which
+    is also what is returned when NumPy is not available, when the board
+    has more than 64 cells or when the waiting player has not been placed.
+
+    One call on a full set of children is only slightly cheaper than
+    scoring them one by one, and a search that batches the leaves scores
+    many that a cutoff would have skipped, so searching with it is slower
+    end to end (see `AlphaBetaPlayer`).
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The parent game state; it is not modified.
+
+    player : object
+        The player from whose point of view the children are scored.
+
+    moves : list<(int, int)>
+        Legal moves of the active player in `game`.
+
+    Returns
+    -------
+    list<float>
+        The heuristic value of each child, in the order of `moves`.
+    """
+    state = game.snapshot()
+    waiting_loc = state.p2_location if state.initiative == 0 else state.p1_location
+    if np is None or game.width * game.height > 64 or waiting_loc is None:
+        return [custom_score(game.forecast_move(move), player) for move in moves]
+
+    knight, bits, rows, cols, center = _batch_tables(game.width, game.height)
+    mover_loc = np.array([r + c * game.height for r, c in moves])
+    blocked = np.uint64(state.blocked) | bits[mover_loc]
+    # In every child the waiting player is the one to move
+    waiting_moves = _popcount64(knight[waiting_loc] & ~blocked)
+    waiting_y, waiting_x = game.get_player_location(game.inactive_player)
+    w, h = game.width / 2., game.height / 2.
+    mover_center_distance = center[mover_loc]
+    waiting_center_distance = abs(h - waiting_y) + abs(w - waiting_x)
+    opp_distance = abs(rows[mover_loc] - waiting_y) + abs(cols[mover_loc] - waiting_x)
+
+    # custom_score counts the active player's moves as its own moves
+    own_moves = waiting_moves
+    if player == game.active_player:
+        opp_moves = waiting_moves
+        center_distance, opp_center_distance = mover_center_distance, waiting_center_distance
+    else:
+        opp_moves = _popcount64(knight[mover_loc] & ~blocked)
+        center_distance, opp_center_distance = waiting_center_distance, mover_center_distance
+
+    d = own_moves * SPEARMINT_WEIGHTS["w_my_moves"] \
+        - opp_moves * SPEARMINT_WEIGHTS["w_opponent_moves"] \
+        - center_distance * SPEARMINT_WEIGHTS["w_center_distance"] \
+        + opp_center_distance * SPEARMINT_WEIGHTS["w_opponent_center_distance"] \
+        - opp_distance * SPEARMINT_WEIGHTS["w_opponent_distance"]
+    d = np.where(opp_distance == 3, d + SPEARMINT_WEIGHTS["w_chase_opponent_factor"], d)
+    # Children where the waiting player is stuck are terminal
+    terminal = -INF if player != game.active_player else INF
+    return np.where(waiting_moves == 0, terminal, d).tolist()
+
+
+_CENTER_DISTANCES = {}
+
+
+def _center_distances(width, height):
+    """Return the distance to the center of every cell of a board of the
+    given size, indexed by row and then column, built once per size.
+    """
+    try:
+        return _CENTER_DISTANCES[(width, height)]
+    except KeyError:
+        w, h = width / 2., height / 2.
+        center = [[abs(h - r) + abs(w - c) for c in range(width)] for r in range(height)]
+        _CENTER_DISTANCES[(width, height)] = center
+        return center
+
+
+class FeatureEvaluator(object):
+    """Weighted sum of the features of `custom_score`, computed in one pass
+    over the board state, usable as the score_fn of any player.
+
+    Both mobilities come from a single `count_mobility` call, each location
+    is read once, and the center distances are looked up in a table built
+    once per board size. With the weights of `custom_score` the value is
+    the same as custom_score's, at about 80% of its cost.
+
+    Parameters
+    ----------
+    weights : dict (optional)
+        A weight for each name in FEATURES, e.g. as written by spear.py;
+        other keys are ignored. Defaults to SPEARMINT_WEIGHTS.
+    """
+    FEATURES = ("w_my_moves", "w_opponent_moves", "w_center_distance",
+                "w_opponent_center_distance", "w_opponent_distance",
+                "w_chase_opponent_factor")
+    PARAMS_FILE = "params.txt"
+
+    def __init__(self, weights=None):
+        if weights is None:
+            weights = SPEARMINT_WEIGHTS
+        missing = [name for name in self.FEATURES if name not in weights]
+        if missing:
+            raise ValueError("Missing feature weights: {}".format(", ".join(missing)))
+        self.weights = tuple(float(weights[name]) for name in self.FEATURES)
+
+    @classmethod
+    def from_file(cls, path=None):
+        """Return an evaluator with the weights of a params JSON file (by
+        default params.txt next to this module).
+        """
+        import json
+        if path is None:
+            import os
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), cls.PARAMS_FILE)
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __call__(self, game, player):
+        """Return the heuristic value of game to player.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        player : object
+            A player instance in the current game.
+
+        Returns
+        -------
+        float
+            The heuristic value of the current game state to the specified player.
+        """
+        active_moves, inactive_moves = game.count_mobility()
+        is_active = player == game.active_player
+        if active_moves == 0:
+            return -INF if is_active else INF
+        my_y, my_x = game.get_player_location(player)
+        opp_y, opp_x = game.get_player_location(
+            game.inactive_player if is_active else game.active_player)
+        center = _center_distances(game.width, game.height)
+        # As in custom_score, "my moves" are the moves of the player to move
+        opp_moves = inactive_moves if is_active else active_moves
+        opp_distance = abs(my_y - opp_y) + abs(my_x - opp_x)
+        w_my_moves, w_opponent_moves, w_center_distance, w_opponent_center_distance, \
+            w_opponent_distance, w_chase_opponent_factor = self.weights
+        d = active_moves * w_my_moves \
+            - opp_moves * w_opponent_moves \
+            - center[my_y][my_x] * w_center_distance \
+            + center[opp_y][opp_x] * w_opponent_center_distance \
+            - opp_distance * w_opponent_distance
+        if opp_distance == 3:
+            d += w_chase_opponent_factor
+        return d
+
+
+class CachedScore(object):
+    """Memoize any score_fn on the position's Zobrist key and the player
+    whose point of view is scored, with the seat (first or second player)
+    of that player, evicting the least recently used value when the cache
+    is full. Zobrist keys tell the seats apart rather than the player
+    objects, so the seat keeps a player that plays first in one game and
+    second in another from getting the values of the other seat.
+
+    The wrapped function is only called on a miss, so the leaves that
+    iterative deepening, transpositions or later moves of the same game
+    reach again are scored once. A position's value must only depend on
+    the board (as with `custom_score` and the `sample_players`
+    heuristics), since the cache is kept until `clear` is called.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The heuristic function to memoize, called as score_fn(game, player).
+
+    max_entries : int (optional)
+        Most values kept in the cache.
+    """
+    def __init__(self, score_fn, max_entries=1 << 16):
+        self.score_fn = score_fn
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, game, player):
+        # 1 when player is the first player, 0 when it is the second
+        seat = game.move_count % 2 ^ (player == game.active_player)
+        key = (game.zobrist, player, seat)
+        cache = self._cache
+        try:
+            value = cache[key]
+        except KeyError:
+            self.misses += 1
+            value = cache[key] = self.score_fn(game, player)
+            if len(cache) > self.max_entries:
+                cache.popitem(last=False)
+            return value
+        self.hits += 1
+        cache.move_to_end(key)
+        return value
+
+    def clear(self):
+        """Empty the cache and reset the counters."""
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """Fraction of calls answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.
+
+
+class AreaEvaluator(object):
+    """Reachable-area heuristic: the number of blank cells the player can
+    reach by knight moves before its opponent, minus the number the
+    opponent reaches first (see `Board.reachable_areas`).
+
+    Unlike the mobility heuristics this looks several moves ahead, at a
+    higher cost per call, so values are cached by Zobrist key: positions
+    met again in later iterations, through transpositions or on later
+    moves of the game are not flood-filled again.
+
+    Parameters
+    ----------
+    depth : int (optional)
+        Only count the cells each player reaches within this many moves;
+        None counts every reachable cell.
+
+    max_entries : int (optional)
+        The cache is cleared when it grows beyond this many positions.
+    """
+    def __init__(self, depth=3, max_entries=1 << 16):
+        self.depth = depth
+        self.max_entries = max_entries
+        # Zobrist key -> value of the position to the player to move
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, game, player):
+        """Return the heuristic value of game to player.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        player : object
+            A player instance in the current game.
+
+        Returns
+        -------
+        float
+            The heuristic value of the current game state to the specified player.
+        """
+        key = game.zobrist
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+            if not game.count_legal_moves():
+                value = -INF
+            else:
+                own, opp = game.reachable_areas(depth=self.depth)
+                value = float(own - opp)
+            self._cache[key] = value
+        else:
+            self.hits += 1
+        return value if player == game.active_player else -value
+
+
 def custom_score_2(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -114,8 +479,9 @@ def custom_score_2(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    own_moves = game.get_legal_moves()
-    if len(own_moves) == 0:
+    # Count the moves of both players in one pass instead of building lists
+    own_moves, inactive_moves = game.count_mobility()
+    if own_moves == 0:
         # terminal state. We don't use the Isolation.Board builtin functions for the sake of
         # efficiency (no need to recalculate the list of legal moves)
         if player == game.active_player:
@@ -126,7 +492,7 @@ def custom_score_2(game, player):
             return INF
     else:
         opponent = game.get_opponent(player)
-        opp_moves = game.get_legal_moves(opponent)
+        opp_moves = own_moves if opponent == game.active_player else inactive_moves
         w, h = game.width / 2., game.height / 2.
         my_y, my_x = game.get_player_location(player)
         my_center_distance = abs(h - my_y) + abs(w - my_x)
@@ -140,8 +506,8 @@ def custom_score_2(game, player):
         w_chase_opponent_factor = 1.5   # Extra boost.
 
         # Metric value
-        d = len(own_moves) * w_my_moves \
-            - len(opp_moves) * w_opponent_moves \
+        d = own_moves * w_my_moves \
+            - opp_moves * w_opponent_moves \
             - my_center_distance * w_center \
             + opp_center_distance * w_center
 
@@ -175,8 +541,9 @@ def custom_score_3(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    own_moves = game.get_legal_moves()
-    if len(own_moves) == 0:
+    # Count the moves of both players in one pass instead of building lists
+    own_moves, inactive_moves = game.count_mobility()
+    if own_moves == 0:
         # terminal state. We don't use the Isolation.Board builtin functions for the sake of
         # efficiency (no need to recalculate the list of legal moves)
         if player == game.active_player:
@@ -186,11 +553,289 @@ def custom_score_3(game, player):
             # player wins
             return INF
     else:
-        opp_moves = game.get_legal_moves(game.get_opponent(player))
+        opponent = game.get_opponent(player)
+        opp_moves = own_moves if opponent == game.active_player else inactive_moves
         w_my_moves = 1.5
         w_opponent_moves = 1.0
 
-        return len(own_moves) * w_my_moves - len(opp_moves) * w_opponent_moves
+        return own_moves * w_my_moves - opp_moves * w_opponent_moves
+
+class TranspositionTable(object):
+    """Fixed-size hash table of search results keyed on the board's Zobrist
+    key, shared by every iterative-deepening iteration and every move of an
+    `AlphaBetaPlayer`.
+
+    Each slot holds the key, searched depth, value, bound type (EXACT, LOWER
+    or UPPER) and best move of one node. A new entry replaces the old one
+    when the slot is empty, holds the same position, was stored during an
+    earlier move (see `new_search`), or was searched less deeply.
+
+    Parameters
+    ----------
+    size : int (optional)
+        Number of slots in the table, rounded up to a power of two.
+    """
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    def __init__(self, size=1 << 16):
+        slots = 1
+        while slots < size:
+            slots <<= 1
+        self._mask = slots - 1
+        self._slots = [None] * slots
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+
+    def new_search(self):
+        """Age the stored entries so that results from previous moves are the
+        first ones to be replaced.
+        """
+        self.generation += 1
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        self._slots = [None] * len(self._slots)
+        self.generation = 0
+        self.probes = self.hits = self.cutoffs = 0
+
+    def probe(self, key, depth, alpha, beta):
+        """Look up a node searched to `depth` plies with window (alpha, beta).
+
+        Returns
+        -------
+        (float or None, (int, int) or None)
+            The stored value if it is deep enough and its bound settles the
+            node for the given window (otherwise None), and the stored best
+            move to try first (None if the position is not in the table).
+        """
+        self.probes += 1
+        entry = self._slots[key & self._mask]
+        if entry is None or entry[0] != key:
+            return None, None
+        self.hits += 1
+        _, entry_depth, value, bound, move, _ = entry
+        if entry_depth >= depth and (bound == TranspositionTable.EXACT or
+                                     (bound == TranspositionTable.LOWER and value >= beta) or
+                                     (bound == TranspositionTable.UPPER and value <= alpha)):
+            self.cutoffs += 1
+            return value, move
+        return None, move
+
+    def store(self, key, depth, value, alpha, beta, move):
+        """Record the value of a node searched to `depth` plies with window
+        (alpha, beta); the bound type follows from where value falls.
+        """
+        idx = key & self._mask
+        entry = self._slots[idx]
+        if (entry is None or entry[0] == key or entry[5] != self.generation or
+                depth >= entry[1]):
+            if value <= alpha:
+                bound = TranspositionTable.UPPER
+            elif value >= beta:
+                bound = TranspositionTable.LOWER
+            else:
+                bound = TranspositionTable.EXACT
+            self._slots[idx] = (key, depth, value, bound, move, self.generation)
+
+    @property
+    def hit_rate(self):
+        """Fraction of probes that found the position in the table."""
+        return self.hits / self.probes if self.probes else 0.
+
+    @property
+    def cutoff_rate(self):
+        """Fraction of probes answered by the table without searching."""
+        return self.cutoffs / self.probes if self.probes else 0.
+
+
+class EndgameSolver(object):
+    """Exact win/loss solver for positions with few blank cells left.
+
+    Runs a full-depth negamax over wins and losses (Isolation has no draws)
+    and remembers the outcome and winning move of every position it solves
+    by Zobrist key, so the following moves of the same endgame are answered
+    from the table. Partitioned positions with few enough blank cells are
+    settled by comparing the players' longest paths instead of being
+    searched.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The table is cleared when it grows beyond this many positions.
+    """
+    def __init__(self, max_entries=1 << 20):
+        self.max_entries = max_entries
+        # Zobrist key -> (whether the player to move wins, best move)
+        self._memo = {}
+        self.nodes = 0
+        self.solve_time = 0.
+
+    def solve(self, game, time_left, threshold=0.):
+        """Solve game for the player to move.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position to solve; it is searched in place and restored.
+
+        time_left : callable
+            A function that returns the number of milliseconds left; the
+            search raises `SearchTimeout` when it drops below threshold.
+
+        threshold : float (optional)
+            Milliseconds to keep in reserve.
+
+        Returns
+        -------
+        (bool, (int, int))
+            Whether the player to move wins with perfect play, and the move
+            to play: a winning move if there is one, otherwise the move the
+            opponent has the fewest replies to. `nodes` and `solve_time` (in
+            milliseconds) are updated, also when the search times out.
+        """
+        if len(self._memo) > self.max_entries:
+            self._memo.clear()
+        self.nodes = 0
+        start = time_left()
+        try:
+            return self._negamax(game, time_left, threshold)
+        finally:
+            self.solve_time = start - time_left()
+
+    def _negamax(self, game, time_left, threshold):
+        """Return (the player to move wins, best move) for game."""
+        key = game.zobrist
+        result = self._memo.get(key)
+        if result is not None:
+            return result
+        if time_left() < threshold:
+            raise SearchTimeout()
+        self.nodes += 1
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            result = (False, (-1, -1))
+        elif len(game.get_blank_spaces()) <= PARTITION_SOLVE_CELLS and game.is_partitioned():
+            path = game.longest_path()
+            result = (len(path) > len(game.longest_path(game.inactive_player)), path[0])
+        else:
+            # Leave the opponent as few replies as possible: forcing lines
+            # are searched first and fail fastest
+            legal_moves.sort(key=lambda move: self._replies(game, move))
+            result = (False, legal_moves[0])
+            for move in legal_moves:
+                game.apply_move(move)
+                try:
+                    opponent_wins, _ = self._negamax(game, time_left, threshold)
+                finally:
+                    game.undo_move()
+                if not opponent_wins:
+                    result = (True, move)
+                    break
+        self._memo[key] = result
+        return result
+
+    @staticmethod
+    def _replies(game, move):
+        """Count the opponent's legal moves after move."""
+        game.apply_move(move)
+        count = game.count_legal_moves()
+        game.undo_move()
+        return count
+
+
+class OpeningBook(object):
+    """Read-only table of book moves by position, stored in a binary file
+    that is memory-mapped rather than loaded (see build_book.py).
+
+    The file is a 16-byte header (the magic bytes b"ISOBOOK2", the board
+    width and height as unsigned shorts and the number of slots as an
+    unsigned int, little-endian) followed by an open-addressing hash table
+    of '<QH' records: the canonical key of a position (see
+    `Board.canonical`) and the book move on the canonical board as a cell
+    index (row + column * height), EMPTY in unused slots. A position is
+    looked up at slot key % slots and the following slots until its key or
+    an empty slot is found; the table is at most half full. Storing one
+    entry for all the symmetric images of a position makes the book up to
+    8 times smaller.
+
+    Parameters
+    ----------
+    path : str
+        Path of a book file written by `OpeningBook.write`.
+    """
+    MAGIC = b"ISOBOOK2"
+    HEADER = "<8sHHI"
+    RECORD = "<QH"
+    EMPTY = 0xFFFF
+
+    def __init__(self, path):
+        # mmap and struct are only needed by players that use a book
+        import mmap
+        import struct
+        self._struct = struct
+        self._header_size = struct.calcsize(OpeningBook.HEADER)
+        self._record_size = struct.calcsize(OpeningBook.RECORD)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, slots = struct.unpack_from(OpeningBook.HEADER,
+                                                                   self._map, 0)
+        if magic != OpeningBook.MAGIC:
+            raise ValueError("Not an opening book: {}".format(path))
+        self._mask = slots - 1
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, game):
+        """Return the book move for game, or None if the position is not in
+        the book (or the board has a different size).
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        self.probes += 1
+        key, transform = game.canonical()
+        slot = key & self._mask
+        while True:
+            entry, move = self._struct.unpack_from(
+                OpeningBook.RECORD, self._map, self._header_size + slot * self._record_size)
+            if move == OpeningBook.EMPTY:
+                return None
+            if entry == key:
+                self.hits += 1
+                return game.transform_move((move % self.height, move // self.height),
+                                           transform, inverse=True)
+            slot = (slot + 1) & self._mask
+
+    def close(self):
+        """Unmap the book file."""
+        self._map.close()
+
+    @staticmethod
+    def write(path, width, height, moves):
+        """Write a book file for a width x height board from a dict mapping
+        the canonical key of each position to its (row, column) book move on
+        the canonical board (`Board.transform_move` of the move with the
+        transform returned by `Board.canonical`).
+        """
+        import struct
+        slots = 1
+        while slots < 2 * len(moves):
+            slots <<= 1
+        table = [None] * slots
+        for key, move in moves.items():
+            slot = key & (slots - 1)
+            while table[slot] is not None:
+                slot = (slot + 1) & (slots - 1)
+            table[slot] = (key, move[0] + move[1] * height)
+        with open(path, "wb") as f:
+            f.write(struct.pack(OpeningBook.HEADER, OpeningBook.MAGIC, width, height, slots))
+            for entry in table:
+                f.write(struct.pack(OpeningBook.RECORD, *(entry or (0, OpeningBook.EMPTY))))
+
 
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
@@ -221,7 +866,86 @@ class IsolationPlayer:
         self.TIMER_THRESHOLD = timeout
 
 
-class MinimaxPlayer(IsolationPlayer):
+class PollingPlayer(IsolationPlayer):
+    """Base class for search agents that read the clock only every few
+    nodes rather than at every node, and report statistics on each move.
+
+    The searches count their nodes in `nodes` and call `_poll_clock` when
+    the count reaches `_next_poll`. Each poll measures how long the nodes
+    since the previous one took, and sets the interval to the next poll so
+    that it should take no more than POLL_LATENCY of TIMER_THRESHOLD: the
+    timer is then never noticed more than that late.
+
+    After each move, `stats` holds the `SearchStats` of its search.
+
+    Parameters
+    ----------
+    stats_callback : callable (optional)
+        A function called as stats_callback(player, stats) with the
+        `SearchStats` of every move before it is returned.
+    """
+    # Longest time between two reads of the clock, as a fraction of
+    # TIMER_THRESHOLD
+    POLL_LATENCY = .25
+    # Most nodes between two reads of the clock
+    MAX_POLL_INTERVAL = 4096
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=25., stats_callback=None):
+        super().__init__(search_depth=search_depth, score_fn=score_fn, timeout=timeout)
+        self.stats_callback = stats_callback
+        self.stats = None
+        self.nodes = 0
+        self.leaves = 0
+        self._start_left = None
+        self._next_poll = 0
+        self._poll_interval = 1
+        self._poll_left = None
+        self._poll_nodes = 0
+
+    def _start_move(self, time_left):
+        """Reset the statistics and start the clock of a new move."""
+        self.nodes = self.leaves = 0
+        self._start_clock(time_left)
+        self._start_left = time_left()
+
+    def _record_stats(self, depth, cutoffs, iteration_times):
+        """Set `stats` for the move being returned, and pass them to the
+        callback.
+        """
+        left = self.time_left()
+        elapsed = self._start_left - left
+        self.stats = SearchStats(self.nodes, self.leaves, depth,
+                                 1000. * self.nodes / elapsed if elapsed > 0 else 0.,
+                                 cutoffs, list(iteration_times), left)
+        if self.stats_callback is not None:
+            self.stats_callback(self, self.stats)
+
+    def _start_clock(self, time_left):
+        """Search against time_left from now on, reading it at the next node."""
+        self.time_left = time_left
+        self._next_poll = self.nodes
+        self._poll_interval = 1
+        self._poll_left = None
+
+    def _poll_clock(self):
+        """Raise SearchTimeout if the timer is about to expire, and schedule
+        the next poll.
+        """
+        left = self.time_left()
+        if left < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+        interval = 2 * self._poll_interval
+        if self._poll_left is not None and self._poll_left > left:
+            # Nodes searched in the latency budget at the measured rate
+            budget = self.POLL_LATENCY * self.TIMER_THRESHOLD
+            rate = (self.nodes - self._poll_nodes) / (self._poll_left - left)
+            interval = min(interval, int(budget * rate))
+        self._poll_interval = max(1, min(interval, self.MAX_POLL_INTERVAL))
+        self._poll_left, self._poll_nodes = left, self.nodes
+        self._next_poll = self.nodes + self._poll_interval
+
+
+class MinimaxPlayer(PollingPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
@@ -255,7 +979,7 @@ class MinimaxPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        self.time_left = time_left
+        self._start_move(time_left)
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -264,12 +988,15 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            self._record_stats(self.search_depth, 0, [self._start_left - self.time_left()])
+            return best_move
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
         # Return the best move from the last completed search iteration
+        self._record_stats(0, 0, [])
         return best_move
 
     def minimax(self, game, depth):
@@ -311,15 +1038,21 @@ class MinimaxPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.nodes >= self._next_poll:
+            self._poll_clock()
 
         legal_moves = game.get_legal_moves()
 
+        # Search a private copy of the board in place with apply_move/undo_move.
+        # A timeout may leave it mid-line, so it is never handed back
+        game = game.copy()
         best_score = -INF
         best_move = (-1, -1) if len(legal_moves) == 0 else legal_moves[0]
         for move in legal_moves:
-            score = self.min_value(game.forecast_move(move), depth-1)
+            game.apply_move(move)
+            score = self.min_value(game, depth-1)
+            game.undo_move()
             if score > best_score:
                 best_move = move
                 best_score = score
@@ -345,12 +1078,13 @@ class MinimaxPlayer(IsolationPlayer):
         float
             Minimum value obtained
         """
-
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.nodes >= self._next_poll:
+            self._poll_clock()
 
         if depth == 0:
             # Stop here. Evaluate the state of the board
+            self.leaves += 1
             return self.score(game, self)
 
         legal_moves = game.get_legal_moves()
@@ -361,8 +1095,9 @@ class MinimaxPlayer(IsolationPlayer):
 
         v = INF
         for move in legal_moves:
-            new_game = game.forecast_move(move)
-            v = min(v, self.max_value(new_game, depth-1))
+            game.apply_move(move)
+            v = min(v, self.max_value(game, depth-1))
+            game.undo_move()
         return v
 
 
@@ -385,11 +1120,13 @@ class MinimaxPlayer(IsolationPlayer):
         float
             Maximum value obtained
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.nodes >= self._next_poll:
+            self._poll_clock()
 
         if depth == 0:
             # Stop here. Evaluate the state of the board
+            self.leaves += 1
             return self.score(game, self)
 
         legal_moves = game.get_legal_moves()
@@ -399,15 +1136,161 @@ class MinimaxPlayer(IsolationPlayer):
 
         v = -INF
         for move in legal_moves:
-            new_game = game.forecast_move(move)
-            v = max(v, self.min_value(new_game, depth-1))
+            game.apply_move(move)
+            v = max(v, self.min_value(game, depth-1))
+            game.undo_move()
         return v
 
-class AlphaBetaPlayer(IsolationPlayer):
+class AlphaBetaPlayer(PollingPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    tt : `TranspositionTable` (optional)
+        Transposition table used to cut off and order the search. It keeps
+        its entries between iterations and moves, so give each player its
+        own table. No table is used by default.
+
+    batch_score_fn : callable (optional)
+        A function (game, player, moves) returning the score_fn value of
+        every child reached by the active player playing one of moves (e.g.
+        `custom_score_batch` for `custom_score`). When given, the children of
+        nodes one ply above the search horizon are scored with one call once
+        the first of them has failed to cause a cutoff. With knight-move
+        branching factors the NumPy call overhead outweighs the savings:
+        iterative deepening to depth 8 takes about 1.5 times as long as
+        without batching, so this is off by default.
+
+    move_ordering : bool (optional)
+        Search the previous iteration's principal variation first, then the
+        killer moves of the ply, then the rest by history-heuristic score.
+        The fraction of cutoffs found on the first move searched is reported
+        by `first_move_cutoff_rate`.
+
+    pvs : bool (optional)
+        Use principal variation search: every move after the first at a node
+        is searched with a null window and only re-searched if it turns out
+        better. Each iterative-deepening depth also starts from an aspiration
+        window around the previous depth's score, widened on failure.
+
+    aspiration_window : float (optional)
+        Half width of the first aspiration window, in score units.
+
+    ponder : bool (optional)
+        Keep searching in a background thread after returning a move: the
+        positions after each opponent reply (the predicted one first) are
+        deepened in turn until `Board.play` calls `notify_move`. When the
+        opponent plays one of them, `get_move` resumes from the deepest
+        pondered iteration. Pondering shares the interpreter with the
+        opponent, so it only gains time when the opponent runs elsewhere or
+        waits on I/O.
+
+    solve_partitions : bool (optional)
+        Once the two players can no longer reach a common cell, the game is
+        decided by who has the longer path in their own region. Search nodes
+        with three or more plies left in that state are scored as an exact
+        win or loss when path bounds or an exact longest-path search settle
+        it, and get_move plays along the longest path without searching.
+
+    endgame_cells : int (optional)
+        When no more than this many blank cells are left, get_move solves
+        the game exactly with `EndgameSolver` instead of searching. The
+        solver may use ENDGAME_TIME_FRACTION of the time left; if it does
+        not finish, the rest goes to the search. The solver's `nodes` and
+        `solve_time` report the last solve.
+
+    book : `OpeningBook` (optional)
+        Positions found in the book are answered with the book move without
+        searching.
+
+    workers : int (optional)
+        With more than one worker, each iterative-deepening iteration
+        searches the first root move here and splits the other root moves
+        across a pool of that many processes, started on the first search
+        and kept until `close` is called.
+
+    stats_callback : callable (optional)
+        Called with the player and the `SearchStats` of every move, as
+        described in `PollingPlayer`.
+
+    prune_symmetric : bool (optional)
+        Search only one of the root moves that a symmetry of the position
+        (see `Board.symmetries`) maps onto each other. This is only sound
+        when score_fn gives symmetric positions the same value, which
+        `custom_score` does not: it measures distances to a center that is
+        off the middle cell.
     """
+    # Milliseconds after which pondering stops on its own, e.g. if the game
+    # ended without another call to notify_move or get_move
+    PONDER_LIMIT = 10000.
+    # The next iteration is skipped when even this fraction of its predicted
+    # time exceeds the time left: predictions are often off by a factor of 2
+    ITERATION_SKIP_FRACTION = .5
+    # Fraction of the time left that the endgame solver may use, the rest
+    # being kept for the search if the solver does not finish
+    ENDGAME_TIME_FRACTION = .5
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=25., tt=None,
+                 batch_score_fn=None, move_ordering=True, pvs=False, aspiration_window=8.,
+                 ponder=False, solve_partitions=True, endgame_cells=30,
+                 book=None, workers=1, stats_callback=None, prune_symmetric=False):
+        super().__init__(search_depth=search_depth, score_fn=score_fn, timeout=timeout,
+                         stats_callback=stats_callback)
+        self.tt = tt
+        self.batch_score = batch_score_fn
+        self.move_ordering = move_ordering
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self._tt_salt = 0
+        # Value of the root after the last alphabeta call, fail-soft when the
+        # root window was narrower than (-INF, INF)
+        self.root_score = None
+
+        self.ponder = ponder
+        self.ponder_hits = 0
+        # Deepest completed iteration of each pondered position by Zobrist
+        # key: (depth, best move, root score, PV, PV keys)
+        self._ponder_results = {}
+        self._ponder_thread = None
+        self._ponder_stop = None
+
+        self.solve_partitions = solve_partitions
+        # Exact value (or None if undecided) of partitioned positions by
+        # Zobrist key
+        self._partition_values = {}
+
+        self.endgame_cells = endgame_cells
+        self.endgame = EndgameSolver()
+        self.book = book
+        self.prune_symmetric = prune_symmetric
+        self.workers = workers
+        self._pool = None
+
+        # Principal variation of the last completed iteration, the Zobrist
+        # key of the position each of its moves is played from, and the
+        # triangular table that collects the PV of the running iteration
+        self._pv = []
+        self._pv_keys = []
+        self._pv_table = [[]]
+        self._root_depth = 0
+        # Two killer moves per ply, and cutoff counts by (from, to) cells
+        self._killers = []
+        self._history = {}
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Nodes and milliseconds of each completed iteration of the last
+        # move, and the depth of the deepest one
+        self.completed_depth = 0
+        self.iteration_nodes = []
+        self.iteration_times = []
+
+    @property
+    def first_move_cutoff_rate(self):
+        """Fraction of the cutoffs of the last move caused by the first move
+        searched at the node.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -439,7 +1322,29 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        self.time_left = time_left
+        self._stop_pondering()
+        self._start_move(time_left)
+        self.completed_depth = 0
+        move = self._select_move(game)
+        # Before pondering starts, as it resets the clock and the counters
+        self._record_stats(self.completed_depth, self.cutoffs, self.iteration_times)
+        if self.ponder and move != (-1, -1):
+            predicted = self._pv[1] if self._pv[:1] == [move] and len(self._pv) > 1 else None
+            self._start_pondering(game.forecast_move(move), predicted)
+        return move
+
+    def _select_move(self, game):
+        """Return the move to play in game: from the book, the partition or
+        endgame solvers, or else the deepest completed iteration of the
+        search.
+        """
+        if self.tt is not None:
+            self.tt.new_search()
+        self.cutoffs = self.first_move_cutoffs = 0
+        self.iteration_nodes, self.iteration_times = [], []
+        self._pv, self._pv_keys, self._killers = [], [], []
+        # Age the history scores so that older games weigh less
+        self._history = {key: value // 2 for key, value in self._history.items() if value > 1}
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -447,10 +1352,48 @@ class AlphaBetaPlayer(IsolationPlayer):
         legal_moves = game.get_legal_moves(self)
         if len(legal_moves) > 0:
             best_move = legal_moves[0]
+        if len(legal_moves) == 1:
+            # There is nothing to choose
+            return best_move
+        self.root_score = None
+        self._partition_values = {}
+        if self.book is not None:
+            move = self.book.probe(game)
+            if move in legal_moves:
+                return move
+        if (self.solve_partitions and len(legal_moves) > 0 and game.is_partitioned()
+                and len(game.get_blank_spaces()) <= PARTITION_SOLVE_CELLS):
+            # Nothing the opponent does matters any more: make the most moves
+            return game.longest_path(self)[0]
+        if len(legal_moves) > 0 and len(game.get_blank_spaces()) <= self.endgame_cells:
+            try:
+                reserve = max((1 - self.ENDGAME_TIME_FRACTION) * self.time_left(),
+                              self.TIMER_THRESHOLD)
+                _, move = self.endgame.solve(game, self.time_left, reserve)
+                return move
+            except SearchTimeout:
+                pass  # Search with the time that is left
+        depth = 1
+        pondered = self._ponder_results.get(game.zobrist)
+        self._ponder_results = {}
+        if pondered is not None:
+            # The opponent played a reply we searched on its time
+            self.ponder_hits += 1
+            depth, best_move, self.root_score, self._pv, self._pv_keys = pondered
+            self.completed_depth = depth
+            depth += 1
         try:
-            depth = 1
             while True:
-                best_move = self.alphabeta(game, depth)
+                nodes, start = self.nodes, self.time_left()
+                best_move = self._search_depth(game, depth, parallel=self.workers > 1)
+                self._save_pv(game)
+                self.completed_depth = depth
+                self.iteration_nodes.append(self.nodes - nodes)
+                self.iteration_times.append(start - self.time_left())
+                if self.root_score in (INF, -INF) or not self._next_iteration_fits():
+                    # Deeper search can't change a proven result, and an
+                    # iteration cut short by the timer is wasted
+                    break
                 depth += 1
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
@@ -458,6 +1401,156 @@ class AlphaBetaPlayer(IsolationPlayer):
         # Return the best move from the last completed search iteration
         return best_move
 
+    def notify_move(self, game, move):
+        """Called by `Board.play` with a copy of the board once the opponent's
+        move has been applied: the opponent's time is over, so stop pondering.
+        """
+        self._stop_pondering()
+
+    def close(self):
+        """Terminate the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _next_iteration_fits(self):
+        """Return whether the next iteration may finish in the time left,
+        assuming it costs as much more than the last one as the effective
+        branching factor of the last two iterations predicts.
+        """
+        nodes, times = self.iteration_nodes, self.iteration_times
+        if len(nodes) < 3 or not nodes[-3]:
+            return True
+        # The branching factor is estimated over two iterations because
+        # alpha-beta trees alternate between cheaper and costlier depths
+        ebf = (nodes[-1] / nodes[-3]) ** 0.5
+        predicted = times[-1] * ebf
+        return self.ITERATION_SKIP_FRACTION * predicted < self.time_left() - self.TIMER_THRESHOLD
+
+    def _search_depth(self, game, depth, parallel=False):
+        """Complete one iterative-deepening iteration and return its best move."""
+        if parallel:
+            return self._parallel_search(game, depth)
+        if self.pvs:
+            return self._aspiration_search(game, depth)
+        return self.alphabeta(game, depth)
+
+    def _worker_pool(self):
+        """Return the worker pool, starting it on first use."""
+        if self._pool is None:
+            import multiprocessing
+            settings = dict(score_fn=self.score, timeout=self.TIMER_THRESHOLD,
+                            tt=None if self.tt is None else TranspositionTable(len(self.tt._slots)),
+                            batch_score_fn=self.batch_score, move_ordering=self.move_ordering,
+                            pvs=self.pvs, solve_partitions=self.solve_partitions)
+            self._pool = multiprocessing.Pool(self.workers, _init_search_worker, (settings,))
+        return self._pool
+
+    def _parallel_search(self, game, depth):
+        """Search game to the given depth with the root moves split across the
+        worker pool, and return the best move.
+
+        The first move in search order is searched here to get a lower bound
+        on the root value; the other moves are then searched in parallel by
+        the workers with that bound as alpha, each from a snapshot of the
+        board. The workers stop one `TIMER_THRESHOLD` before this player
+        must, which leaves time to collect their results.
+        """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+        legal_moves = game.get_legal_moves()
+        if self.prune_symmetric:
+            legal_moves = self._distinct_moves(game, legal_moves)
+        if len(legal_moves) < 2:
+            return self.alphabeta(game, depth)
+        self._tt_salt = _TT_PLAYER_2_KEY if game.move_count % 2 else 0
+        self._start_iteration(depth)
+        self._order_moves(game, legal_moves, 0, None)
+
+        board = game.copy()
+        board.apply_move(legal_moves[0])
+        best_move, best_score = legal_moves[0], self.min_value(board, depth - 1, -INF, INF)
+        self._pv_table[0] = [best_move] + self._pv_table[1]
+
+        import multiprocessing
+        from timeit import default_timer
+        deadline = 1000 * default_timer() + self.time_left() - self.TIMER_THRESHOLD
+        snapshot = game.snapshot()
+        pool = self._worker_pool()
+        results = [(move, pool.apply_async(_search_root_move,
+                                           ((snapshot, move, depth, best_score, deadline),)))
+                   for move in legal_moves[1:]]
+        for move, result in results:
+            try:
+                outcome = result.get(max(self.time_left() - self.TIMER_THRESHOLD, 0.) / 1000.)
+            except multiprocessing.TimeoutError:
+                outcome = None
+            if outcome is None:
+                raise SearchTimeout()
+            score, nodes, leaves = outcome
+            self.nodes += nodes
+            self.leaves += leaves
+            if score > best_score:
+                best_move, best_score = move, score
+                # The workers don't report their principal variations
+                self._pv_table[0] = [move]
+        self.root_score = best_score
+        return best_move
+
+    def _start_pondering(self, game, predicted):
+        """Start searching the replies to the opponent's moves from game (with
+        the opponent to move) in a background thread.
+        """
+        import threading
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target=self._ponder, args=(game, predicted),
+                                               daemon=True)
+        self._ponder_thread.start()
+
+    def _stop_pondering(self):
+        """Stop the pondering thread, if any, and wait for it to finish."""
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = self._ponder_stop = None
+
+    def _ponder(self, game, predicted):
+        """Deepen the positions after each opponent reply in game one
+        iteration at a time, recording every completed iteration in
+        `_ponder_results`, until told to stop.
+        """
+        from timeit import default_timer
+        stop = self._ponder_stop
+        deadline = 1000 * default_timer() + self.PONDER_LIMIT
+
+        def time_left():
+            return -INF if stop.is_set() else deadline - 1000 * default_timer()
+
+        self._start_clock(time_left)
+        replies = game.get_legal_moves()
+        if predicted in replies:
+            replies.remove(predicted)
+            replies.insert(0, predicted)
+        # Positions where we have no move are lost without any search
+        positions = [board for board in map(game.forecast_move, replies)
+                     if board.get_legal_moves()]
+        results = self._ponder_results
+        try:
+            for depth in range(1, len(game.get_blank_spaces())):
+                for board in positions:
+                    key = board.zobrist
+                    if key in results:
+                        _, _, self.root_score, self._pv, self._pv_keys = results[key]
+                    else:
+                        self.root_score, self._pv, self._pv_keys = None, [], []
+                    best_move = self._search_depth(board, depth)
+                    self._save_pv(board)
+                    results[key] = (depth, best_move, self.root_score, self._pv, self._pv_keys)
+        except SearchTimeout:
+            pass
+
 
     def alphabeta(self, game, depth, alpha=-INF, beta=INF):
         """Implement depth-limited minimax search with alpha-beta pruning as
@@ -504,21 +1597,48 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.nodes >= self._next_poll:
+            self._poll_clock()
 
         # We assume that there is not going to be timeout while obtaining the legal moves (there will be a maximum
         # of four moves anytime)
         legal_moves = game.get_legal_moves()
+        if self.prune_symmetric:
+            legal_moves = self._distinct_moves(game, legal_moves)
+        # The root player is the one to move; table values are always from
+        # its point of view
+        self._tt_salt = _TT_PLAYER_2_KEY if game.move_count % 2 else 0
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            key = game.zobrist ^ self._tt_salt
+            _, tt_move = tt.probe(key, depth, alpha, beta)
+        self._start_iteration(depth)
+        self._order_moves(game, legal_moves, 0, tt_move)
+        alpha_orig = alpha
+
+        # Search a private copy of the board in place with apply_move/undo_move.
+        # A timeout may leave it mid-line, so it is never handed back
+        game = game.copy()
         best_score = -INF
         # Pick a best move != (-1, -1) to avoid forfeit
         best_move = (-1, -1) if len(legal_moves) == 0 else legal_moves[0]
-        for move in legal_moves:
-            score = self.min_value(game.forecast_move(move), depth-1, alpha, beta)
+        for i, move in enumerate(legal_moves):
+            game.apply_move(move)
+            score = self._search_child(self.min_value, game, depth - 1, alpha, beta, i)
+            game.undo_move()
             if score > best_score:
                 best_move = move
                 best_score = score
+                self._pv_table[0] = [move] + self._pv_table[1]
+            if best_score >= beta:
+                # Only reachable with an aspiration window
+                break
             alpha = max(alpha, best_score)
+        if tt is not None and legal_moves:
+            tt.store(key, depth, best_score, alpha_orig, beta, best_move)
+        self.root_score = best_score
         return best_move
 
 
@@ -548,24 +1668,68 @@ class AlphaBetaPlayer(IsolationPlayer):
             Minimum value obtained
         """
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.nodes >= self._next_poll:
+            self._poll_clock()
         if depth == 0:
             # Stop here
+            self.leaves += 1
             return self.score(game, self)
 
+        if depth > self._root_depth:
+            # Called directly rather than from alphabeta
+            self._start_iteration(depth)
+        ply = self._root_depth - depth
+        pv_table = self._pv_table
+        pv_table[ply] = []
+
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            key = game.zobrist ^ self._tt_salt
+            value, tt_move = tt.probe(key, depth, alpha, beta)
+            if value is not None:
+                return value
+        if self.solve_partitions and depth > 2 and game.is_partitioned():
+            value = self._partition_value(game)
+            if value is not None:
+                return value
+
         legal_moves = game.get_legal_moves()
         if len(legal_moves) == 0:
             # Terminal state. Should evaluate to -INF
             return game.utility(self)
+        self._order_moves(game, legal_moves, ply, tt_move)
 
+        alpha_orig, beta_orig = alpha, beta
         v = INF
-        # try:
-        for move in legal_moves:
-            v = min(v, self.max_value(game.forecast_move(move), depth - 1, alpha, beta))
+        best_move = legal_moves[0]
+        # One ply above the horizon the first move is searched alone, as it
+        # causes most cutoffs; if it does not, the other leaf children are
+        # scored in one call, and the scores consumed in move order so the
+        # cutoffs are the same as searching them
+        batch = depth == 1 and self.batch_score is not None and len(legal_moves) > 1
+        scores = None
+        for i, move in enumerate(legal_moves):
+            if scores is None:
+                game.apply_move(move)
+                score = self._search_child(self.max_value, game, depth - 1, alpha, beta, i)
+                game.undo_move()
+            else:
+                score = scores[i - 1]
+            if score < v:
+                v, best_move = score, move
+                if alpha < v < beta:
+                    pv_table[ply] = [move] + pv_table[ply + 1]
             if v <= alpha:
-                return v
+                self._record_cutoff(game, move, depth, i)
+                break
             beta = min(beta, v)
+            if batch and i == 0:
+                scores = self.batch_score(game, self, legal_moves[1:])
+                self.leaves += len(legal_moves) - 1
+        if tt is not None:
+            tt.store(key, depth, v, alpha_orig, beta_orig, best_move)
         return v
 
     def max_value(self, game, depth, alpha, beta):
@@ -593,24 +1757,261 @@ class AlphaBetaPlayer(IsolationPlayer):
         float
             Maximum value obtained
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self.nodes += 1
+        if self.nodes >= self._next_poll:
+            self._poll_clock()
 
         if depth == 0:
             # Stop here
+            self.leaves += 1
             return self.score(game, self)
 
+        if depth > self._root_depth:
+            # Called directly rather than from alphabeta
+            self._start_iteration(depth)
+        ply = self._root_depth - depth
+        pv_table = self._pv_table
+        pv_table[ply] = []
+
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            key = game.zobrist ^ self._tt_salt
+            value, tt_move = tt.probe(key, depth, alpha, beta)
+            if value is not None:
+                return value
+        if self.solve_partitions and depth > 2 and game.is_partitioned():
+            value = self._partition_value(game)
+            if value is not None:
+                return value
+
         legal_moves = game.get_legal_moves()
         # legal_moves = [(3,5), (4,4)]
         if len(legal_moves) == 0:
             # Terminal state. Should evaluate to INF
             return game.utility(self)
+        self._order_moves(game, legal_moves, ply, tt_move)
 
+        alpha_orig, beta_orig = alpha, beta
         v = -INF
-        # try:
-        for move in legal_moves:
-            v = max(v, self.min_value(game.forecast_move(move), depth - 1, alpha, beta))
+        best_move = legal_moves[0]
+        # One ply above the horizon the first move is searched alone, as it
+        # causes most cutoffs; if it does not, the other leaf children are
+        # scored in one call, and the scores consumed in move order so the
+        # cutoffs are the same as searching them
+        batch = depth == 1 and self.batch_score is not None and len(legal_moves) > 1
+        scores = None
+        for i, move in enumerate(legal_moves):
+            if scores is None:
+                game.apply_move(move)
+                score = self._search_child(self.min_value, game, depth - 1, alpha, beta, i)
+                game.undo_move()
+            else:
+                score = scores[i - 1]
+            if score > v:
+                v, best_move = score, move
+                if alpha < v < beta:
+                    pv_table[ply] = [move] + pv_table[ply + 1]
             if v >= beta:
-                return v
+                self._record_cutoff(game, move, depth, i)
+                break
             alpha = max(alpha, v)
+            if batch and i == 0:
+                scores = self.batch_score(game, self, legal_moves[1:])
+                self.leaves += len(legal_moves) - 1
+        if tt is not None:
+            tt.store(key, depth, v, alpha_orig, beta_orig, best_move)
         return v
+
+    def _partition_value(self, game):
+        """Return INF or -INF if the winner of the partitioned game is known,
+        and None otherwise.
+
+        The player to move wins if its longest path is longer than the
+        opponent's; path bounds settle most positions, and the paths are only
+        searched for when few blank cells are left.
+        """
+        key = game.zobrist
+        if key in self._partition_values:
+            return self._partition_values[key]
+        active, inactive = game.active_player, game.inactive_player
+        own_low, own_high = game.path_bounds(active)
+        opp_low, opp_high = game.path_bounds(inactive)
+        if own_low > opp_high:
+            wins = True
+        elif own_high <= opp_low:
+            wins = False
+        elif len(game.get_blank_spaces()) <= PARTITION_SOLVE_CELLS:
+            wins = len(game.longest_path(active)) > len(game.longest_path(inactive))
+        else:
+            wins = None
+        value = None if wins is None else INF if wins == (active == self) else -INF
+        self._partition_values[key] = value
+        return value
+
+    @staticmethod
+    def _distinct_moves(game, legal_moves):
+        """Drop the moves that a symmetry of the position maps onto an
+        earlier move, since both lead to positions with the same exact value.
+        """
+        symmetries = game.symmetries()
+        if len(symmetries) == 1:
+            return legal_moves
+        seen = set()
+        distinct = []
+        for move in legal_moves:
+            if move not in seen:
+                distinct.append(move)
+                seen.update(game.transform_move(move, t) for t in symmetries)
+        return distinct
+
+    def _search_child(self, search, game, depth, alpha, beta, index):
+        """Search the child position in game with search (min_value or
+        max_value), as the index-th move of its parent.
+
+        With principal variation search, every child but the first is
+        searched with a null window just above alpha (below beta for a
+        minimizing parent) to prove it is no better than the first, and only
+        re-searched with the full window if that proof fails.
+        """
+        if not self.pvs or index == 0:
+            return search(game, depth, alpha, beta)
+        if search == self.min_value:
+            # Maximizing parent: is the child worth more than alpha?
+            score = search(game, depth, alpha, nextafter(alpha, INF))
+            if alpha < score < beta:
+                score = search(game, depth, alpha, beta)
+        else:
+            # Minimizing parent: is the child worth less than beta?
+            score = search(game, depth, nextafter(beta, -INF), beta)
+            if alpha < score < beta:
+                score = search(game, depth, alpha, beta)
+        return score
+
+    def _aspiration_search(self, game, depth):
+        """Run alphabeta to the given depth with a window around the score of
+        the previous depth, widening the side that fails until the root value
+        falls inside the window.
+        """
+        score = self.root_score
+        if score is None or score in (INF, -INF):
+            return self.alphabeta(game, depth)
+        delta = self.aspiration_window
+        alpha, beta = score - delta, score + delta
+        while True:
+            best_move = self.alphabeta(game, depth, alpha, beta)
+            if alpha > -INF and self.root_score <= alpha:
+                delta *= 4
+                alpha = score - delta if delta < 64 * self.aspiration_window else -INF
+            elif beta < INF and self.root_score >= beta:
+                delta *= 4
+                beta = score + delta if delta < 64 * self.aspiration_window else INF
+            else:
+                return best_move
+
+    def _start_iteration(self, depth):
+        """Size the per-ply tables for a search to the given depth."""
+        self._root_depth = depth
+        self._pv_table = [[] for _ in range(depth + 1)]
+        while len(self._killers) <= depth:
+            self._killers.append([None, None])
+
+    def _order_moves(self, game, legal_moves, ply, tt_move):
+        """Sort legal_moves in place into search order: the move of the
+        previous principal variation if this node lies on it, the
+        transposition table move, the killer moves of the ply, and then the
+        remaining moves by decreasing history score.
+        """
+        if not self.move_ordering:
+            if tt_move in legal_moves:
+                # Try the best move of a previous search first
+                legal_moves.remove(tt_move)
+                legal_moves.insert(0, tt_move)
+            return
+        ranks = {}
+        if ply < len(self._pv_keys) and self._pv_keys[ply] == game.zobrist:
+            ranks[self._pv[ply]] = 0
+        killers = self._killers[ply]
+        for rank, move in ((1, tt_move), (2, killers[0]), (3, killers[1])):
+            if move is not None and move not in ranks:
+                ranks[move] = rank
+        loc = game.get_player_location(game.active_player)
+        history = self._history
+        legal_moves.sort(key=lambda move: (ranks.get(move, 4), -history.get((loc, move), 0)))
+
+    def _record_cutoff(self, game, move, depth, index):
+        """Count a cutoff caused by the index-th move searched at a node, and
+        credit the move in the killer and history tables.
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self.move_ordering:
+            killers = self._killers[self._root_depth - depth]
+            if killers[0] != move:
+                killers[0], killers[1] = move, killers[0]
+            key = (game.get_player_location(game.active_player), move)
+            self._history[key] = self._history.get(key, 0) + depth * depth
+
+    def _save_pv(self, game):
+        """Keep the principal variation of the completed iteration, with the
+        key of each position along it, to be searched first by the next one.
+        """
+        self._pv = self._pv_table[0]
+        self._pv_keys = []
+        board = game.copy()
+        for move in self._pv:
+            self._pv_keys.append(board.zobrist)
+            board.apply_move(move)
+
+
+# Player of the current process when it is a worker of an AlphaBetaPlayer's
+# pool, set up by _init_search_worker, and the root position it last searched
+_worker_player = None
+_worker_root = None
+
+
+def _init_search_worker(settings):
+    """Create the player of a worker process from the AlphaBetaPlayer
+    arguments in settings.
+    """
+    global _worker_player
+    _worker_player = AlphaBetaPlayer(endgame_cells=0, **settings)
+
+
+def _search_root_move(task):
+    """Search one root move in a worker process and return its value with the
+    numbers of nodes and leaves searched, or None if the deadline passed
+    first.
+
+    task is a tuple (snapshot, move, depth, alpha, deadline): the root
+    position as a `BoardSnapshot`, the move to search, the depth of the
+    iteration, the best value found so far at the root, and the time (in
+    milliseconds of `timeit.default_timer`) at which to give up.
+    """
+    global _worker_root
+    from timeit import default_timer
+    from isolation import Board
+    snapshot, move, depth, alpha, deadline = task
+    player = _worker_player
+    if snapshot != _worker_root:
+        # A new move of the game: age the entries of earlier moves, as the
+        # player's own search does
+        _worker_root = snapshot
+        if player.tt is not None:
+            player.tt.new_search()
+    player._start_clock(lambda: deadline - 1000 * default_timer())
+    players = ("opponent", player) if snapshot.initiative else (player, "opponent")
+    # Unshuffled, so that the order of equal moves and thus the search do
+    # not depend on which worker picks up the task
+    game = Board.from_snapshot(snapshot, *players, shuffle=False)
+    player._tt_salt = _TT_PLAYER_2_KEY if game.move_count % 2 else 0
+    player._start_iteration(depth)
+    player._pv, player._pv_keys = [], []
+    player._partition_values = {}
+    player.nodes = player.leaves = 0
+    game.apply_move(move)
+    try:
+        return player.min_value(game, depth - 1, alpha, INF), player.nodes, player.leaves
+    except SearchTimeout:
+        return None
@@ -9,10 +9,131 @@ be available to project reviewers.
 """
 import random
 import timeit
+from collections import namedtuple
 from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# (row, column) offsets of the eight L-shaped knight moves
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _popcount(mask):
+        return bin(mask).count("1")
+
+
+class _Geometry(object):
+    """Lookup tables shared by every board with the same width and height.
+
+    Cells are indexed column-major (``idx = row + column * height``), and bit
+    ``idx`` of an integer bitmask represents that cell.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+        self.coords = [(idx % height, idx // height) for idx in range(self.size)]
+
+        # knight_masks[idx] has a bit set for every in-bounds cell a knight
+        # can reach from idx on an empty board; ANDed with the blank cells it
+        # counts the legal moves without building a list
+        self.knight_masks = []
+        for r, c in self.coords:
+            mask = 0
+            for dr, dc in KNIGHT_DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << (r + dr + (c + dc) * height)
+            self.knight_masks.append(mask)
+
+        # Cells with an even row + column; every knight move changes color
+        self.even_cells = sum(1 << idx for idx, (r, c) in enumerate(self.coords)
+                              if not (r + c) % 2)
+
+        # (shift, source mask) for each knight direction: the cells of a
+        # bitmask that can make that jump are moved all at once by shifting
+        # them left (or right, for a negative shift), for flood fills
+        self.knight_shifts = []
+        for dr, dc in KNIGHT_DIRECTIONS:
+            sources = 0
+            for idx, (r, c) in enumerate(self.coords):
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    sources |= 1 << idx
+            self.knight_shifts.append((dr + dc * height, sources))
+
+        # neighbors[idx] lists (bit, (row, column)) for each in-bounds knight
+        # destination of idx, so move generation only tests for blank cells
+        self.neighbors = [tuple((1 << n, self.coords[n])
+                                for n in range(self.size) if mask >> n & 1)
+                          for mask in self.knight_masks]
+
+        # Symmetries of the board, which all preserve knight moves, as maps
+        # from each cell (row, column) to its image: the 8 symmetries of the
+        # square on square boards, otherwise the 4 that keep the rectangle.
+        # transforms[t][idx] is the cell index of the image of cell idx, and
+        # inverse[t] is the symmetry that undoes t
+        h, w = height - 1, width - 1
+        maps = [lambda r, c: (r, c), lambda r, c: (h - r, w - c),
+                lambda r, c: (h - r, c), lambda r, c: (r, w - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r), lambda r, c: (w - c, h - r),
+                     lambda r, c: (c, h - r), lambda r, c: (w - c, r)]
+        self.transforms = [tuple(r + c * height for r, c in (f(*rc) for rc in self.coords))
+                           for f in maps]
+        self.inverse = [next(u for u, other in enumerate(self.transforms)
+                             if all(other[image] == idx for idx, image in enumerate(perm)))
+                        for perm in self.transforms]
+
+        # Zobrist keys: one random 64-bit value per blocked cell, per player
+        # location and for player 2 to move. The generator is seeded by the
+        # board size so keys agree across processes and runs
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        self.zobrist_blocked = [rng.getrandbits(64) for _ in range(self.size)]
+        self.zobrist_location = [[rng.getrandbits(64) for _ in range(self.size)]
+                                 for _ in range(2)]
+        self.zobrist_side = rng.getrandbits(64)
+        # Combined key change for a player arriving on a cell (which blocks
+        # it and passes the initiative)
+        self.zobrist_arrive = [[self.zobrist_blocked[idx] ^ keys[idx] ^ self.zobrist_side
+                                for idx in range(self.size)]
+                               for keys in self.zobrist_location]
+
+    def cells(self, mask):
+        """Return the (row, column) coordinates of the cells set in mask,
+        ordered by increasing cell index.
+        """
+        coords = self.coords
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+
+_GEOMETRIES = {}
+
+
+def _geometry(width, height):
+    """Return the shared lookup tables for a board of the given size."""
+    try:
+        return _GEOMETRIES[(width, height)]
+    except KeyError:
+        geometry = _GEOMETRIES[(width, height)] = _Geometry(width, height)
+        return geometry
+
+
+# Immutable, hashable record of a game state without the player objects. The
+# locations are cell indices (row + column * height) or None if not placed,
+# and initiative is 0 when player 1 is to move and 1 for player 2
+BoardSnapshot = namedtuple("BoardSnapshot", ["width", "height", "blocked", "p1_location",
+                                             "p2_location", "initiative", "move_count"])
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -33,11 +154,27 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    seed : int (optional)
+        Seed for the board's own random number generator, which shuffles the
+        legal moves. Copies share the generator of the board they came from,
+        so games and searches started from a seeded board are reproducible.
+        By default the seed is drawn from the global `random` module.
+
+    shuffle : bool (optional)
+        If False, legal moves are returned in a stable order (by increasing
+        cell index) instead of being shuffled, for callers that do their own
+        move ordering.
     """
     BLANK = 0
     NOT_MOVED = None
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    __slots__ = ("width", "height", "move_count", "_player_1", "_player_2",
+                 "_active_player", "_inactive_player", "_geometry", "_blocked",
+                 "_locations", "_initiative", "_zobrist", "_history",
+                 "_active_moves", "_terminal", "_seed", "_shuffle", "_rng")
+
+    def __init__(self, player_1, player_2, width=7, height=7, seed=None, shuffle=True):
         self.width = width
         self.height = height
         self.move_count = 0
@@ -46,14 +183,94 @@ class Board(object):
         self._active_player = player_1
         self._inactive_player = player_2
 
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        # The board state is a bitmask of the blocked cells, the cell index
+        # of each player (NOT_MOVED until placed) and the initiative (0 for
+        # player 1, 1 for player 2)
+        self._geometry = _geometry(width, height)
+        self._blocked = 0
+        self._locations = [Board.NOT_MOVED, Board.NOT_MOVED]
+        self._initiative = 0
+
+        # 64-bit Zobrist key of the state, updated incrementally by
+        # apply_move() and undo_move()
+        self._zobrist = 0
+
+        # Previous location of the mover for each move applied to this board
+        # object, so that undo_move() can restore the state in place. Copies
+        # start with an empty history: they only ever undo their own moves
+        self._history = []
+
+        # Legal moves of the active player and whether it has none, memoized
+        # for the current state (None until computed)
+        self._active_moves = None
+        self._terminal = None
+
+        # The generator is only created when moves are first shuffled
+        self._seed = random.getrandbits(64) if seed is None else seed
+        self._shuffle = shuffle
+        self._rng = None
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return a hash of the current state covering the blocked cells,
+        both player locations and the player with initiative. This is the
+        Zobrist key of the board, so it costs O(1).
+        """
+        return self._zobrist
+
+    @property
+    def zobrist(self):
+        """The incrementally maintained 64-bit Zobrist key of the current
+        game state.
+        """
+        return self._zobrist
+
+    def canonical(self):
+        """Return the canonical form of the position among its symmetric
+        images (see `transform_move`), which all have the same game value.
+
+        Returns
+        -------
+        (int, int)
+            The smallest Zobrist key of the images of the position, and the
+            symmetry that maps this board onto the image with that key.
+        """
+        keys = self._symmetric_keys()
+        key = min(keys)
+        return key, keys.index(key)
+
+    def symmetries(self):
+        """Return the list of symmetries (see `transform_move`) that map the
+        position onto itself; the identity, 0, is always one of them. Two
+        moves are equivalent if one of these maps one onto the other.
+        """
+        keys = self._symmetric_keys()
+        return [t for t, key in enumerate(keys) if key == keys[0]]
+
+    def transform_move(self, move, transform, inverse=False):
+        """Return the image of the cell move under a symmetry of the board.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column).
+
+        transform : int
+            The index of the symmetry: 0 to 7 on square boards (rotations and
+            reflections) and 0 to 3 otherwise (180 degree rotation and
+            reflections), with 0 the identity.
+
+        inverse : bool (optional)
+            If True, apply the symmetry that undoes transform instead.
+
+        Returns
+        -------
+        (int, int)
+            The coordinate pair (row, column) of the image of move.
+        """
+        geometry = self._geometry
+        if inverse:
+            transform = geometry.inverse[transform]
+        return geometry.coords[geometry.transforms[transform][move[0] + move[1] * self.height]]
 
     @property
     def active_player(self):
@@ -92,13 +309,69 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        # Fill the slots directly rather than running __init__ and then
+        # overwriting its state
+        new_board = object.__new__(type(self))
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        new_board._geometry = self._geometry
+        new_board._blocked = self._blocked
+        new_board._locations = copy(self._locations)
+        new_board._initiative = self._initiative
+        new_board._zobrist = self._zobrist
+        new_board._history = []
+        new_board._active_moves = self._active_moves
+        new_board._terminal = self._terminal
+        new_board._seed = self._seed
+        new_board._shuffle = self._shuffle
+        new_board._rng = self._get_rng() if self._shuffle else None
         return new_board
 
+    def snapshot(self):
+        """Return an immutable `BoardSnapshot` of the current game state that
+        can be stored in sets and dicts, or sent to another process.
+        """
+        return BoardSnapshot(self.width, self.height, self._blocked, self._locations[0],
+                             self._locations[1], self._initiative, self.move_count)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, player_1, player_2, seed=None, shuffle=True):
+        """Create a board in the state recorded by a `BoardSnapshot`.
+
+        Parameters
+        ----------
+        snapshot : `BoardSnapshot`
+            A snapshot returned by `Board.snapshot()`.
+
+        player_1, player_2 : object
+            The players registered as first and second player.
+
+        seed, shuffle : (optional)
+            As for the `Board` constructor.
+        """
+        board = cls(player_1, player_2, width=snapshot.width, height=snapshot.height,
+                    seed=seed, shuffle=shuffle)
+        geometry = board._geometry
+        board.move_count = snapshot.move_count
+        board._blocked = snapshot.blocked
+        board._locations = [snapshot.p1_location, snapshot.p2_location]
+        board._initiative = snapshot.initiative
+        if snapshot.initiative:
+            board._active_player, board._inactive_player = player_2, player_1
+            board._zobrist ^= geometry.zobrist_side
+        for idx in range(geometry.size):
+            if snapshot.blocked >> idx & 1:
+                board._zobrist ^= geometry.zobrist_blocked[idx]
+        for slot, idx in enumerate(board._locations):
+            if idx is not Board.NOT_MOVED:
+                board._zobrist ^= geometry.zobrist_location[slot][idx]
+        return board
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -134,13 +407,12 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
-                self._board_state[idx] == Board.BLANK)
+                not self._blocked >> idx & 1)
 
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        return self._geometry.cells(~self._blocked & self._geometry.full)
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -157,19 +429,15 @@ class Board(object):
             if the player has not moved.
         """
         if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
+            idx = self._locations[0]
         elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
+            idx = self._locations[1]
         else:
             raise RuntimeError(
                 "Invalid player in get_player_location: {}".format(player))
-        w = idx // self.height
-        h = idx % self.height
-        return (h, w)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._geometry.coords[idx]
 
     def get_legal_moves(self, player=None):
         """Return the list of all legal moves for the specified player.
@@ -186,9 +454,233 @@ class Board(object):
             The list of coordinate pairs (row, column) of all legal moves
             for the player constrained by the current game state.
         """
+        if player is None or player == self._active_player:
+            # The active player's moves are memoized until the state changes
+            moves = self._active_moves
+            if moves is None:
+                moves = self._active_moves = self.__get_moves(self._locations[self._initiative])
+                self._terminal = not moves
+            return list(moves)
+        if player == self._player_1:
+            return self.__get_moves(self._locations[0])
+        elif player == self._player_2:
+            return self.__get_moves(self._locations[1])
+        raise RuntimeError(
+            "Invalid player in get_legal_moves: {}".format(player))
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player, without
+        allocating the list of moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves, equal to len(get_legal_moves(player)).
+        """
+        if player is None or player == self._active_player:
+            if self._active_moves is not None:
+                return len(self._active_moves)
+            count = self.__count_moves(self._locations[self._initiative])
+            self._terminal = count == 0
+            return count
+        if player == self._player_1:
+            return self.__count_moves(self._locations[0])
+        elif player == self._player_2:
+            return self.__count_moves(self._locations[1])
+        raise RuntimeError(
+            "Invalid player in count_legal_moves: {}".format(player))
+
+    def count_mobility(self, player=None):
+        """Count the legal moves of the specified player and of its opponent
+        in a single call.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            use the active player on the board.
+
+        Returns
+        -------
+        (int, int)
+            The number of legal moves of the player and of its opponent.
+        """
+        if player is None:
+            player = self._active_player
+        p1_moves = self.__count_moves(self._locations[0])
+        p2_moves = self.__count_moves(self._locations[1])
+        self._terminal = (p2_moves if self._initiative else p1_moves) == 0
+        if player == self._player_1:
+            return p1_moves, p2_moves
+        elif player == self._player_2:
+            return p2_moves, p1_moves
+        raise RuntimeError(
+            "Invalid player in count_mobility: {}".format(player))
+
+    def is_partitioned(self):
+        """Return True if both players are placed and no blank cell can be
+        reached by both of them, so that neither can affect the other's
+        moves for the rest of the game.
+        """
+        p1_idx, p2_idx = self._locations
+        if p1_idx is None or p2_idx is None:
+            return False
+        # The regions are unions of connected groups of blank cells, so they
+        # overlap exactly when player 1 can reach a cell next to player 2
+        p2_moves = self._geometry.knight_masks[p2_idx]
+        return not self._region(p1_idx, ~self._blocked & self._geometry.full, p2_moves) & p2_moves
+
+    def path_bounds(self, player=None):
+        """Bound the length of the longest path of the specified player (the
+        active player by default) without searching for it.
+
+        The lower bound is the length of a greedy path that always moves to
+        the blank cell with the fewest onward moves; the upper bound counts
+        the cells of the player's region that a path could visit, given that
+        knight moves alternate colors and a path can only end in one cell
+        that has a single neighbor.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game, which must
+            have been placed on the board. If None, use the active player.
+
+        Returns
+        -------
+        (int, int)
+            The lower and upper bounds on len(longest_path(player)).
+        """
+        idx = self.__placed_location(player, "path_bounds")
+        blank = ~self._blocked & self._geometry.full
+        return self._greedy_path_length(idx, blank), self._path_bound(idx, blank)
+
+    def reachable_areas(self, player=None, depth=None):
+        """Count the blank cells that the specified player (the active player
+        by default) and its opponent can each reach by knight moves before
+        the other one.
+
+        Both players spread out from their locations one move at a time,
+        the player to move first, so a cell both can reach in the same
+        number of moves goes to the player to move. Cells already claimed by
+        a player are not crossed by the other.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. Both
+            players must have been placed on the board. If None, use the
+            active player.
+
+        depth : int (optional)
+            Only count the cells reachable within this many moves of each
+            player. If None, count every reachable cell.
+
+        Returns
+        -------
+        (int, int)
+            The numbers of cells reached first by the player and by its
+            opponent.
+        """
         if player is None:
-            player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+            player = self._active_player
+        own = self.__placed_location(player, "reachable_areas")
+        opp = self.__placed_location(self.get_opponent(player), "reachable_areas")
+        shifts = self._geometry.knight_shifts
+        free = ~self._blocked & self._geometry.full
+        fronts = [1 << own, 1 << opp]
+        areas = [0, 0]
+        order = (0, 1) if player == self._active_player else (1, 0)
+        moves = 0
+        while (fronts[0] or fronts[1]) and (depth is None or moves < depth):
+            moves += 1
+            for side in order:
+                front = fronts[side]
+                reach = 0
+                for shift, sources in shifts:
+                    if shift > 0:
+                        reach |= (front & sources) << shift
+                    else:
+                        reach |= (front & sources) >> -shift
+                front = reach & free
+                free &= ~front
+                fronts[side] = front
+                areas[side] += _popcount(front)
+        return areas[0], areas[1]
+
+    def longest_path(self, player=None):
+        """Return a longest list of moves the specified player (the active
+        player by default) can make in a row, ignoring the opponent.
+
+        Once the board is partitioned (see `is_partitioned`) this is exactly
+        how long the player can keep moving, and the player to move wins if
+        and only if its path is longer than the opponent's. The search is
+        exhaustive, so it gets slow for regions of more than about two dozen
+        cells; `path_bounds` is a cheap alternative.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game, which must
+            have been placed on the board. If None, use the active player.
+
+        Returns
+        -------
+        list<(int, int)>
+            The coordinate pairs (row, column) of the moves along the path.
+        """
+        idx = self.__placed_location(player, "longest_path")
+        knight_masks = self._geometry.knight_masks
+        region = self._region
+        path_bound = self._path_bound
+        memo = {}
+
+        def longest(idx, blank):
+            # Cells the knight can never reach again don't matter
+            blank &= region(idx, blank)
+            key = (idx, blank)
+            if key in memo:
+                return memo[key]
+            bound = path_bound(idx, blank)
+            best = 0
+            moves = knight_masks[idx] & blank
+            # Try the most constrained cells first (Warnsdorff's rule) to
+            # reach the bound early
+            order = []
+            while moves:
+                bit = moves & -moves
+                moves ^= bit
+                nxt = bit.bit_length() - 1
+                order.append((_popcount(knight_masks[nxt] & blank), nxt, bit))
+            for _, nxt, bit in sorted(order):
+                length = 1 + longest(nxt, blank ^ bit)
+                if length > best:
+                    best = length
+                    if best == bound:
+                        break
+            memo[key] = best
+            return best
+
+        path = []
+        blank = ~self._blocked & self._geometry.full
+        remaining = longest(idx, blank)
+        while remaining:
+            bits = knight_masks[idx] & blank
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                nxt = bit.bit_length() - 1
+                if longest(nxt, blank ^ bit) == remaining - 1:
+                    break
+            idx, blank, remaining = nxt, blank ^ bit, remaining - 1
+            path.append(self._geometry.coords[idx])
+        return path
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -200,20 +692,48 @@ class Board(object):
             the active player on the board.
         """
         idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
-        self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        slot = self._initiative
+        prev = self._locations[slot]
+        self._zobrist ^= self._geometry.zobrist_arrive[slot][idx]
+        if prev is not Board.NOT_MOVED:
+            self._zobrist ^= self._geometry.zobrist_location[slot][prev]
+        self._history.append(prev)
+        self._locations[slot] = idx
+        self._blocked |= 1 << idx
+        self._initiative ^= 1
+        self._active_moves = self._terminal = None
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def undo_move(self):
+        """Revert the most recent call to apply_move() in-place.
+
+        Together with apply_move() this lets a search walk the game tree on
+        a single mutable board instead of allocating a copy per node with
+        forecast_move(). Only legal moves can be undone correctly.
+        """
+        if not self._history:
+            raise RuntimeError("There is no move to undo on this board.")
+        self._initiative ^= 1
+        slot = self._initiative
+        idx = self._locations[slot]
+        prev = self._history.pop()
+        self._zobrist ^= self._geometry.zobrist_arrive[slot][idx]
+        if prev is not Board.NOT_MOVED:
+            self._zobrist ^= self._geometry.zobrist_location[slot][prev]
+        self._blocked &= ~(1 << idx)
+        self._locations[slot] = prev
+        self._active_moves = self._terminal = None
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and self.__is_terminal()
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and self.__is_terminal()
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +757,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if self.__is_terminal():
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,21 +767,152 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def __is_terminal(self):
+        """Return True if the active player has no legal moves, reusing the
+        memoized result for the current state when there is one.
+        """
+        if self._terminal is None:
+            self._terminal = not self.__count_moves(self._locations[self._initiative])
+        return self._terminal
+
+    def _symmetric_keys(self):
+        """Return the Zobrist key of the image of the position under each
+        symmetry of the board (the identity first).
+        """
+        geometry = self._geometry
+        zobrist_blocked = geometry.zobrist_blocked
+        keys = []
+        for perm in geometry.transforms:
+            key = geometry.zobrist_side if self._initiative else 0
+            blocked = self._blocked
+            while blocked:
+                bit = blocked & -blocked
+                blocked ^= bit
+                key ^= zobrist_blocked[perm[bit.bit_length() - 1]]
+            for slot, idx in enumerate(self._locations):
+                if idx is not None:
+                    key ^= geometry.zobrist_location[slot][perm[idx]]
+            keys.append(key)
+        return keys
+
+    def _region(self, idx, blank, stop=0):
+        """Return the bitmask of the blank cells reachable from the cell index
+        idx through any number of knight moves, or part of it as soon as it
+        includes one of the cells set in stop.
+        """
+        shifts = self._geometry.knight_shifts
+        region = 0
+        front = 1 << idx
+        while front and not region & stop:
+            # Move every cell of the frontier along each knight direction
+            reach = 0
+            for shift, sources in shifts:
+                if shift > 0:
+                    reach |= (front & sources) << shift
+                else:
+                    reach |= (front & sources) >> -shift
+            front = reach & blank & ~region
+            region |= front
+        return region
+
+    def _path_bound(self, idx, blank):
+        """Upper bound on the length of a knight's path from the cell index
+        idx through the blank cells, all of which are assumed reachable.
+        """
+        # A path alternates colors, starting with the color idx is not on
+        even_cells = self._geometry.even_cells
+        same = _popcount(blank & (even_cells if even_cells >> idx & 1 else ~even_cells))
+        other = _popcount(blank) - same
+        bound = 2 * same + 1 if other > same else 2 * other
+        # Only one cell with a single neighbor can be visited: the last one.
+        # Each direction a cell is reached from is a distinct neighbor
+        cells = blank | 1 << idx
+        one = two = 0
+        for shift, sources in self._geometry.knight_shifts:
+            reach = (cells & sources) << shift if shift > 0 else (cells & sources) >> -shift
+            two |= one & reach
+            one |= reach
+        dead_ends = _popcount(blank & ~two)
+        if dead_ends > 1:
+            bound = min(bound, _popcount(blank) - dead_ends + 1)
+        return bound
+
+    def _greedy_path_length(self, idx, blank):
+        """Length of the path from the cell index idx that always moves to the
+        blank cell with the fewest onward moves (Warnsdorff's rule).
+        """
+        knight_masks = self._geometry.knight_masks
+        length = 0
+        moves = knight_masks[idx] & blank
+        while moves:
+            best = None
+            while moves:
+                bit = moves & -moves
+                moves ^= bit
+                nxt = bit.bit_length() - 1
+                degree = _popcount(knight_masks[nxt] & blank)
+                if best is None or degree < best[0]:
+                    best = (degree, nxt, bit)
+            _, idx, bit = best
+            blank ^= bit
+            length += 1
+            moves = knight_masks[idx] & blank
+        return length
+
+    def __placed_location(self, player, caller):
+        """Return the cell index of a placed player (the active player if
+        None), raising a RuntimeError naming the caller otherwise.
+        """
+        if player is None or player == self._active_player:
+            idx = self._locations[self._initiative]
+        elif player == self._player_1:
+            idx = self._locations[0]
+        elif player == self._player_2:
+            idx = self._locations[1]
+        else:
+            raise RuntimeError(
+                "Invalid player in {}: {}".format(caller, player))
+        if idx == Board.NOT_MOVED:
+            raise RuntimeError(
+                "Player has not been placed in {}: {}".format(caller, player))
+        return idx
+
+    def _block_cell(self, move):
+        """Block a cell without moving a player (used to set up positions)."""
+        idx = move[0] + move[1] * self.height
+        if not self._blocked >> idx & 1:
+            self._blocked |= 1 << idx
+            self._zobrist ^= self._geometry.zobrist_blocked[idx]
+            self._active_moves = self._terminal = None
+
+    def __get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell index idx.
         """
-        if loc == Board.NOT_MOVED:
+        if idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
+        blocked = self._blocked
+        valid_moves = [move for bit, move in self._geometry.neighbors[idx]
+                       if not blocked & bit]
+        if self._shuffle:
+            (self._rng or self._get_rng()).shuffle(valid_moves)
         return valid_moves
 
+    def __count_moves(self, idx):
+        """Count the possible L-shaped moves from the cell index idx."""
+        if idx == Board.NOT_MOVED:
+            return _popcount(~self._blocked & self._geometry.full)
+        return _popcount(self._geometry.knight_masks[idx] & ~self._blocked)
+
+    def _get_rng(self):
+        """Return the board's random number generator, creating it from the
+        board's seed on first use.
+        """
+        if self._rng is None:
+            self._rng = random.Random(self._seed)
+        return self._rng
+
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
         return self.to_string()
@@ -271,8 +922,8 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        p1_loc = self._locations[0]
+        p2_loc = self._locations[1]
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
@@ -282,7 +933,7 @@ class Board(object):
             out += prefix.format(i) + ' | '
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
+                if not self._blocked >> idx & 1:
                     out += ' '
                 elif p1_loc == idx:
                     out += symbols[0]
@@ -340,3 +991,9 @@ class Board(object):
             move_history.append(list(curr_move))
 
             self.apply_move(curr_move)
+
+            # Let the waiting player know what was played, e.g. to stop
+            # thinking on the opponent's time
+            notify_move = getattr(self._active_player, "notify_move", None)
+            if notify_move is not None:
+                notify_move(self.copy(), curr_move)
@@ -65,7 +65,7 @@ def open_move_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+    return float(game.count_legal_moves(player))
 
 
 def improved_score(game, player):
@@ -95,8 +95,7 @@ def improved_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves, opp_moves = game.count_mobility(player)
     return float(own_moves - opp_moves)
 
 
@@ -252,8 +251,7 @@ class HumanPlayer():
         return legal_moves[index]
 
 def mark_position(game, move):
-    idx = move[0] + move[1] * game.height
-    game._board_state[idx] = 1
+    game._block_cell(move)
 
 start = None
 end = None
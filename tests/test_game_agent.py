@@ -3,12 +3,28 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import json
+import os
+import tempfile
 import unittest
 
 import isolation
 import game_agent
+import competition_agent
+import sample_players
 
 from importlib import reload
+from timeit import default_timer
+
+
+# Moves played from the empty board to reach the position most tests start from
+OPENING = [(2, 3), (0, 5), (4, 4), (2, 4)]
+
+
+def countdown(time_limit):
+    """Return a time_left() callable that expires after time_limit ms."""
+    deadline = 1000 * default_timer() + time_limit
+    return lambda: deadline - 1000 * default_timer()
 
 
 class IsolationTest(unittest.TestCase):
@@ -20,10 +36,446 @@ class IsolationTest(unittest.TestCase):
         self.player2 = "Player2"
         self.game = isolation.Board(self.player1, self.player2)
 
+    def opening(self, player_1, **kwargs):
+        """Return a board of player_1 against self.player2, built with the
+        Board arguments in kwargs, after the OPENING moves.
+        """
+        game = isolation.Board(player_1, self.player2, **kwargs)
+        for move in OPENING:
+            game.apply_move(move)
+        return game
+
+    def search_position(self, player, **kwargs):
+        """Return the opening board of player, with time enough to search it."""
+        game = self.opening(player, **kwargs)
+        player.time_left = lambda: 1000.
+        return game
+
+    def values_by_depth(self, player, value, depths):
+        """Return value(game, depth) for each of depths, on the unshuffled
+        search position of player.
+        """
+        game = self.search_position(player, shuffle=False)
+        return [value(game, depth) for depth in depths]
+
+    def root_scores(self, player, search, depths):
+        """Return the root score of player after each iteration search(game,
+        depth) of an iterative deepening over depths.
+        """
+        def value(game, depth):
+            search(game, depth)
+            player._save_pv(game)
+            return player.root_score
+        return self.values_by_depth(player, value, depths)
+
+    def seated(self, player, game):
+        """Return a copy of game with player seated on the side to move."""
+        players = (player, self.player2)[::-1 if game.move_count % 2 else 1]
+        return isolation.Board.from_snapshot(game.snapshot(), *players)
+
     def test_example(self):
         # TODO: All methods must start with "test_"
         self.fail("Hello, World!")
 
+    def test_search_does_not_modify_board(self):
+        for player in (game_agent.MinimaxPlayer(), game_agent.AlphaBetaPlayer()):
+            game = isolation.Board(player, self.player2)
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            before = game.to_string()
+            move = player.get_move(game, countdown(100.))
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(game.to_string(), before)
+
+
+    def test_clock_is_polled_within_latency(self):
+        minimax, alphabeta = game_agent.MinimaxPlayer(), game_agent.AlphaBetaPlayer()
+        for player, search in ((minimax, minimax.minimax), (alphabeta, alphabeta.alphabeta)):
+            game = isolation.Board(player, self.player2)
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            # Every node takes 10 microseconds of a 1 second move
+            polls = []
+            player._start_clock(lambda: polls.append(player.nodes) or 1000. - .01 * player.nodes)
+            with self.assertRaises(game_agent.SearchTimeout):
+                search(game, 20)
+            left = 1000. - .01 * player.nodes
+            self.assertLess(left, player.TIMER_THRESHOLD)
+            self.assertGreaterEqual(left, (1 - player.POLL_LATENCY) * player.TIMER_THRESHOLD)
+            self.assertLess(len(polls), player.nodes / 100)
+
+    def test_search_stats_are_reported(self):
+        reported = []
+        callback = lambda player, stats: reported.append((player, stats))
+        for player in (game_agent.MinimaxPlayer(stats_callback=callback),
+                       game_agent.AlphaBetaPlayer(stats_callback=callback)):
+            game = isolation.Board(player, self.player2)
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            time_left = countdown(100.)
+            player.get_move(game, time_left)
+            stats = player.stats
+            self.assertEqual(reported[-1], (player, stats))
+            self.assertGreater(stats.nodes, stats.leaves)
+            self.assertGreater(stats.leaves, 0)
+            self.assertGreater(stats.nps, 0.)
+            self.assertEqual(stats.depth, len(stats.iteration_times) if
+                             isinstance(player, game_agent.AlphaBetaPlayer) else 3)
+            self.assertGreater(stats.time_left, time_left())
+        self.assertGreater(stats.cutoffs, 0)
+
+    def test_transposition_table_preserves_values(self):
+        player = game_agent.AlphaBetaPlayer(tt=game_agent.TranspositionTable(1 << 10))
+        game = self.search_position(player, width=6, height=6)
+        for depth in range(1, 6):
+            player.alphabeta(game, depth)
+            value = player.max_value(game.copy(), depth, -game_agent.INF, game_agent.INF)
+            tt, player.tt = player.tt, None
+            expected = player.max_value(game.copy(), depth, -game_agent.INF, game_agent.INF)
+            player.tt = tt
+            self.assertEqual(value, expected)
+        self.assertGreater(player.tt.hit_rate, 0.)
+
+    def test_transposition_table_replacement(self):
+        tt = game_agent.TranspositionTable(size=3)
+        self.assertEqual(len(tt._slots), 4)
+        tt.store(1, 5, 1., -game_agent.INF, game_agent.INF, (0, 0))
+        tt.store(5, 2, 2., -game_agent.INF, game_agent.INF, (1, 1))
+        self.assertEqual(tt.probe(1, 5, 0., 0.), (1., (0, 0)))
+        tt.new_search()
+        tt.store(5, 2, 2., -game_agent.INF, game_agent.INF, (1, 1))
+        self.assertEqual(tt.probe(1, 5, 0., 0.), (None, None))
+        self.assertEqual(tt.probe(5, 3, 0., 0.), (None, (1, 1)))
+        self.assertEqual(tt.probe(5, 2, 0., 0.), (2., (1, 1)))
+
+
+    def test_custom_score_batch_matches_custom_score(self):
+        game = self.opening(self.player1, seed=7)
+        for move in [(2, 5), (4, 5)]:
+            game.apply_move(move)
+        while game.get_legal_moves():
+            moves = game.get_legal_moves()
+            for player in (self.player1, self.player2):
+                self.assertEqual(game_agent.custom_score_batch(game, player, moves),
+                                 [game_agent.custom_score(game.forecast_move(m), player)
+                                  for m in moves])
+            game.apply_move(moves[0])
+
+    def test_feature_evaluator_matches_custom_score(self):
+        evaluator = game_agent.FeatureEvaluator.from_file()
+        self.assertEqual(evaluator.weights, game_agent.FeatureEvaluator().weights)
+        game = self.opening(self.player1, seed=7)
+        while True:
+            for player in (self.player1, self.player2):
+                self.assertEqual(evaluator(game, player), game_agent.custom_score(game, player))
+            if not game.get_legal_moves():
+                break
+            game.apply_move(game.get_legal_moves()[0])
+
+        weights = dict(game_agent.SPEARMINT_WEIGHTS, w_my_moves=1., __id__=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "params.txt")
+            with open(path, "w") as f:
+                json.dump(weights, f)
+            self.assertEqual(game_agent.FeatureEvaluator.from_file(path).weights[0], 1.)
+        del weights["w_chase_opponent_factor"]
+        with self.assertRaises(ValueError):
+            game_agent.FeatureEvaluator(weights)
+
+    def test_area_evaluator_caches_reachable_areas(self):
+        evaluator = game_agent.AreaEvaluator(depth=2)
+        game = self.opening(self.player1, seed=7)
+        while game.get_legal_moves():
+            own, opp = game.reachable_areas(self.player1, depth=2)
+            self.assertEqual(evaluator(game, self.player1), own - opp)
+            self.assertEqual(evaluator(game, self.player2), opp - own)
+            game.apply_move(game.get_legal_moves()[0])
+        self.assertEqual(evaluator(game, game.active_player), -game_agent.INF)
+        self.assertEqual(evaluator(game, game.inactive_player), game_agent.INF)
+        self.assertEqual(evaluator.hits, evaluator.misses)
+
+    def test_cached_score_evicts_least_recently_used(self):
+        game = self.opening(self.player1, seed=7)
+        children = [game.forecast_move(move) for move in game.get_legal_moves()[:3]]
+        for score_fn in (game_agent.custom_score, game_agent.custom_score_2,
+                         game_agent.custom_score_3, sample_players.improved_score,
+                         sample_players.center_score, sample_players.open_move_score):
+            cached = game_agent.CachedScore(score_fn, max_entries=2)
+            for child in children[:2]:
+                self.assertEqual(cached(child, self.player1), score_fn(child, self.player1))
+            self.assertEqual(cached(children[0], self.player1), score_fn(children[0], self.player1))
+            # The other player's point of view is a separate entry
+            self.assertEqual(cached(children[0], self.player2), score_fn(children[0], self.player2))
+            self.assertEqual((cached.hits, cached.misses), (1, 3))
+            # children[1] was the least recently used, children[0] is kept
+            cached(children[0], self.player2)
+            cached(children[1], self.player1)
+            self.assertEqual((cached.hits, cached.misses), (2, 4))
+            self.assertAlmostEqual(cached.hit_rate, 1 / 3)
+            cached.clear()
+            self.assertEqual((cached.hits, cached.misses, cached.hit_rate), (0, 0, 0.))
+
+    def test_cached_score_tells_seats_apart(self):
+        cached = game_agent.CachedScore(game_agent.custom_score)
+        first = self.opening(self.player1, seed=7)
+        # The same position with the player objects in the other seats
+        second = isolation.Board.from_snapshot(first.snapshot(), self.player2, self.player1)
+        self.assertEqual(first.zobrist, second.zobrist)
+        for game in (first, second):
+            for player in (self.player1, self.player2):
+                self.assertEqual(cached(game, player), game_agent.custom_score(game, player))
+        self.assertEqual(cached.hits, 0)
+
+    def test_batched_search_preserves_values(self):
+        plain = game_agent.AlphaBetaPlayer()
+        batched = game_agent.AlphaBetaPlayer(batch_score_fn=game_agent.custom_score_batch)
+        values = [self.values_by_depth(
+            player, lambda game, depth: player.max_value(game, depth, -game_agent.INF,
+                                                         game_agent.INF), range(1, 5))
+            for player in (plain, batched)]
+        self.assertEqual(values[0], values[1])
+
+    def test_move_ordering_preserves_values(self):
+        ordered = game_agent.AlphaBetaPlayer()
+        unordered = game_agent.AlphaBetaPlayer(move_ordering=False)
+        values = []
+        for player in (ordered, unordered):
+            def value(game, depth):
+                player.alphabeta(game, depth)
+                player._save_pv(game)
+                return player.max_value(game.copy(), depth, -game_agent.INF, game_agent.INF)
+            values.append(self.values_by_depth(player, value, range(1, 6)))
+        self.assertEqual(values[0], values[1])
+        self.assertEqual(len(ordered._pv), 5)
+        self.assertGreater(ordered.first_move_cutoff_rate, 0.)
+        self.assertLessEqual(ordered.first_move_cutoff_rate, 1.)
+
+    def test_principal_variation_search_preserves_values(self):
+        plain = game_agent.AlphaBetaPlayer(tt=game_agent.TranspositionTable())
+        pvs = game_agent.AlphaBetaPlayer(tt=game_agent.TranspositionTable(), pvs=True,
+                                         aspiration_window=1.)
+        self.assertEqual(self.root_scores(plain, plain.alphabeta, range(1, 7)),
+                         self.root_scores(pvs, pvs._aspiration_search, range(1, 7)))
+
+    def test_symmetric_root_moves_are_pruned_only_on_request(self):
+        for score_fn, prune in ((game_agent.custom_score, False),
+                                (sample_players.improved_score, True)):
+            player = game_agent.AlphaBetaPlayer(score_fn=score_fn, prune_symmetric=prune)
+            game = isolation.Board(player, self.player2)
+            game.apply_move((3, 3))
+            game.apply_move((0, 6))
+            self.assertGreater(len(game.symmetries()), 1)
+            player.time_left = lambda: 1000.
+            player.alphabeta(game, 5)
+            # The value of the best of all the root moves
+            expected = max(player.min_value(game.forecast_move(move), 4,
+                                            -game_agent.INF, game_agent.INF)
+                           for move in game.get_legal_moves())
+            self.assertEqual(player.root_score, expected)
+
+    def test_partitioned_positions_are_solved_exactly(self):
+        solver = game_agent.AlphaBetaPlayer()
+        searcher = game_agent.AlphaBetaPlayer(solve_partitions=False)
+        searcher.time_left = lambda: 1000.
+        solved = 0
+        for seed in range(40):
+            game = isolation.Board(self.player1, self.player2, 5, 5, seed=seed)
+            while game.get_legal_moves() and not game.is_partitioned():
+                game.apply_move(game.get_legal_moves()[0])
+            if not game.is_partitioned() or len(game.get_blank_spaces()) > 10:
+                continue
+            for player in (solver, searcher):
+                player.board = self.seated(player, game)
+            exact = searcher.max_value(searcher.board, len(game.get_blank_spaces()),
+                                       -game_agent.INF, game_agent.INF)
+            self.assertEqual(solver._partition_value(solver.board), exact)
+            solved += 1
+        self.assertGreater(solved, 0)
+
+    def test_endgame_solver_matches_exhaustive_search(self):
+        searcher = game_agent.AlphaBetaPlayer(solve_partitions=False, endgame_cells=0)
+        searcher.time_left = lambda: 1000.
+        for seed in range(10):
+            game = isolation.Board(self.player1, self.player2, 5, 5, seed=seed)
+            while len(game.get_blank_spaces()) > 12 and game.get_legal_moves():
+                game.apply_move(game.get_legal_moves()[0])
+            if not game.get_legal_moves():
+                continue
+            board = self.seated(searcher, game)
+            exact = searcher.max_value(board, len(game.get_blank_spaces()),
+                                       -game_agent.INF, game_agent.INF)
+            solver = game_agent.EndgameSolver()
+            wins, move = solver.solve(game, lambda: 1000.)
+            self.assertEqual(wins, exact == game_agent.INF)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertGreater(solver.nodes, 0)
+            self.assertGreaterEqual(solver.solve_time, 0.)
+
+    def test_endgame_solver_timeout_leaves_time_to_search(self):
+        class SlowSolver(object):
+            """Solver that never finishes before its reserve is reached."""
+            def solve(self, game, time_left, threshold):
+                while time_left() >= threshold:
+                    pass
+                raise game_agent.SearchTimeout()
+
+        player = game_agent.AlphaBetaPlayer(endgame_cells=49)
+        player.endgame = SlowSolver()
+        game = isolation.Board(player, self.player2)
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        time_left = countdown(200.)
+        move = player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(player.stats.depth, 0)
+        self.assertGreater(time_left(), 0.)
+
+    def test_opening_book_round_trip(self):
+        positions = [isolation.Board(self.player1, self.player2)]
+        for move in [(3, 3), (2, 1), (1, 3)]:
+            positions.append(positions[-1].forecast_move(move))
+        chosen = [game.get_legal_moves()[-1] for game in positions]
+        moves = {}
+        for game, move in zip(positions, chosen):
+            key, transform = game.canonical()
+            moves[key] = game.transform_move(move, transform)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            game_agent.OpeningBook.write(path, 7, 7, moves)
+            book = game_agent.OpeningBook(path)
+            try:
+                for game, move in zip(positions, chosen):
+                    # Any move equivalent to the chosen one under a symmetry
+                    # of the position may come back
+                    self.assertIn(book.probe(game), [game.transform_move(move, t)
+                                                     for t in game.symmetries()])
+                # A reflection of a book position is found too
+                mirror = isolation.Board(self.player1, self.player2)
+                for move in [(3, 3), (4, 1), (5, 3)]:
+                    mirror.apply_move(move)
+                self.assertEqual(mirror.canonical()[0], positions[3].canonical()[0])
+                self.assertIn(book.probe(mirror), mirror.get_legal_moves())
+                self.assertIsNone(book.probe(positions[1].forecast_move((0, 0))))
+                self.assertIsNone(book.probe(isolation.Board(self.player1, self.player2, 5, 5)))
+
+                player = game_agent.AlphaBetaPlayer(book=book)
+                game = isolation.Board(player, self.player2)
+                game.apply_move((3, 3))
+                game.apply_move((2, 1))
+                self.assertEqual(player.get_move(game, countdown(100.)), chosen[2])
+            finally:
+                book.close()
+
+    def test_pondering_resumes_on_predicted_reply(self):
+        reported = []
+        player = game_agent.AlphaBetaPlayer(ponder=True, endgame_cells=0,
+                                            stats_callback=lambda p, stats: reported.append(stats))
+        opponent = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(player, opponent, 5, 5, seed=3)
+        game.apply_move((2, 2))
+        game.apply_move((0, 0))
+        try:
+            winner, _, _ = game.play(time_limit=60)
+        finally:
+            player._stop_pondering()
+        self.assertIn(winner, (player, opponent))
+        self.assertGreater(player.ponder_hits, 0)
+        # The statistics are those of the move, not of the pondering after it
+        self.assertTrue(reported)
+        for stats in reported:
+            self.assertLess(stats.time_left, 60.)
+            self.assertEqual(stats.nps > 0., stats.nodes > 0)
+        self.assertTrue(any(stats.nodes > 0 for stats in reported))
+
+    def test_iterative_deepening_stops_early(self):
+        player = game_agent.AlphaBetaPlayer(endgame_cells=0, solve_partitions=False)
+        proven = 0
+        for seed in range(10):
+            game = isolation.Board(self.player1, self.player2, 5, 5, seed=seed)
+            while len(game.get_blank_spaces()) > 12 and game.get_legal_moves():
+                game.apply_move(game.get_legal_moves()[0])
+            if not game.get_legal_moves():
+                continue
+            game = self.seated(player, game)
+            time_left = countdown(1000.)
+            move = player.get_move(game, time_left)
+            self.assertIn(move, game.get_legal_moves())
+            if len(game.get_legal_moves()) == 1:
+                self.assertEqual(player.iteration_nodes, [])
+            elif player.root_score in (game_agent.INF, -game_agent.INF):
+                # A proven result is returned without using up the time
+                self.assertGreater(time_left(), 500.)
+                self.assertEqual(len(player.iteration_nodes), len(player.iteration_times))
+                self.assertEqual(sum(player.iteration_nodes), player.nodes)
+                proven += 1
+        self.assertGreater(proven, 0)
+
+        # An iteration predicted to take far longer than the time left is
+        # skipped
+        player.iteration_nodes = [100, 400, 1600]
+        player.iteration_times = [10., 40., 160.]
+        player.time_left = lambda: 400.
+        self.assertTrue(player._next_iteration_fits())
+        player.time_left = lambda: 300.
+        self.assertFalse(player._next_iteration_fits())
+
+    def test_parallel_search_preserves_values(self):
+        serial = game_agent.AlphaBetaPlayer()
+        parallel = game_agent.AlphaBetaPlayer(workers=2)
+        try:
+            values = [self.root_scores(
+                player, lambda game, depth: player._search_depth(
+                    game, depth, parallel=player.workers > 1), range(1, 6))
+                for player in (serial, parallel)]
+            self.assertEqual(values[0], values[1])
+            game = isolation.Board(parallel, self.player2)
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            time_left = countdown(150.)
+            move = parallel.get_move(game, time_left)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertGreater(time_left(), 0.)
+        finally:
+            parallel.close()
+
+    def test_worker_searches_are_reproducible(self):
+        game = self.opening(self.player1)
+        snapshot = game.snapshot()
+        deadline = default_timer() * 1000 + 1e6
+        task = (snapshot, game.get_legal_moves()[0], 5, -float("inf"), deadline)
+        results = []
+        for _ in range(2):
+            game_agent._init_search_worker(dict(tt=game_agent.TranspositionTable(1 << 12)))
+            game_agent._worker_root = None
+            results.append(game_agent._search_root_move(task))
+        self.assertEqual(results[0], results[1])
+        # Entries are aged once per root position, not once per task
+        tt = game_agent._worker_player.tt
+        generation = tt.generation
+        game_agent._search_root_move(task)
+        self.assertEqual(tt.generation, generation)
+        game.apply_move(game.get_legal_moves()[0])
+        game_agent._search_root_move((game.snapshot(), game.get_legal_moves()[0]) + task[2:])
+        self.assertEqual(tt.generation, generation + 1)
+
+    def test_mcts_player_reuses_its_tree(self):
+        player = competition_agent.CustomPlayer(seed=0)
+        game = isolation.Board(player, self.player2, 5, 5, seed=0)
+        game.apply_move((2, 2))
+        game.apply_move((0, 0))
+        move = player.get_move(game, countdown(100.))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(player.playouts_per_second, 0.)
+        game.apply_move(move)
+        reply = game.get_legal_moves()[0]
+        game.apply_move(reply)
+        # The search resumes from the subtree of the opponent's reply
+        reply_node, = [child for child in player._root.children
+                       if child.move == reply[0] + reply[1] * game.height]
+        move = player.get_move(game, countdown(100.))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertIn(player._root, reply_node.children)
+
 
 if __name__ == '__main__':
     unittest.main()
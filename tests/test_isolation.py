@@ -0,0 +1,294 @@
+"""Unit tests for the `isolation.Board` game engine."""
+
+import random
+import unittest
+
+import isolation
+
+
+def reference_moves(game, player):
+    """Enumerate legal moves cell by cell, the way the original list-based
+    engine did, to check the bitboard move generator against.
+    """
+    loc = game.get_player_location(player)
+    if loc is None:
+        return sorted(game.get_blank_spaces())
+    r, c = loc
+    return sorted((r + dr, c + dc) for dr, dc in isolation.isolation.KNIGHT_DIRECTIONS
+                  if game.move_is_legal((r + dr, c + dc)))
+
+
+def reference_longest_path(loc, blank):
+    """Length of the longest knight's path from loc through the set of blank
+    cells, by brute force.
+    """
+    r, c = loc
+    return max([1 + reference_longest_path(move, blank - {move})
+                for move in ((r + dr, c + dc) for dr, dc in isolation.isolation.KNIGHT_DIRECTIONS)
+                if move in blank] or [0])
+
+
+def reference_region(loc, blank):
+    """Set of the blank cells reachable from loc through knight moves."""
+    region, stack = set(), [loc]
+    while stack:
+        r, c = stack.pop()
+        for dr, dc in isolation.isolation.KNIGHT_DIRECTIONS:
+            move = (r + dr, c + dc)
+            if move in blank and move not in region:
+                region.add(move)
+                stack.append(move)
+    return region
+
+
+def reference_areas(locs, blank, depth):
+    """Numbers of blank cells reached first by two players spreading out
+    from locs one knight move at a time, the first player first.
+    """
+    fronts, free, areas = [{locs[0]}, {locs[1]}], set(blank), [0, 0]
+    moves = 0
+    while (fronts[0] or fronts[1]) and (depth is None or moves < depth):
+        moves += 1
+        for side in (0, 1):
+            fronts[side] = {(r + dr, c + dc) for r, c in fronts[side]
+                            for dr, dc in isolation.isolation.KNIGHT_DIRECTIONS} & free
+            free -= fronts[side]
+            areas[side] += len(fronts[side])
+    return tuple(areas)
+
+
+class BoardTest(unittest.TestCase):
+    """Unit tests for the isolation board"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2)
+
+    def play_random_games(self, width, height, num_games=20):
+        """Yield every position of a few random games on a width x height board."""
+        rng = random.Random(width * 31 + height)
+        for _ in range(num_games):
+            game = isolation.Board(self.player1, self.player2, width, height)
+            while True:
+                yield game
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(rng.choice(moves))
+
+    def test_initial_moves_are_blank_spaces(self):
+        self.assertEqual(len(self.game.get_legal_moves()), 49)
+        self.assertEqual(sorted(self.game.get_legal_moves()),
+                         sorted(self.game.get_blank_spaces()))
+
+    def test_legal_moves_match_reference(self):
+        for width, height in [(7, 7), (5, 8), (3, 4)]:
+            for game in self.play_random_games(width, height):
+                for player in (self.player1, self.player2):
+                    self.assertEqual(sorted(game.get_legal_moves(player)),
+                                     reference_moves(game, player))
+
+    def test_neighbor_tables_shared_per_geometry(self):
+        other = isolation.Board(self.player2, self.player1)
+        self.assertIs(self.game._geometry, other._geometry)
+        self.assertIsNot(self.game._geometry,
+                         isolation.Board(self.player1, self.player2, 5, 7)._geometry)
+        corner = self.game._geometry.neighbors[0]
+        self.assertEqual(sorted(move for _, move in corner), [(1, 2), (2, 1)])
+
+    def test_move_is_legal_out_of_bounds(self):
+        self.assertFalse(self.game.move_is_legal((-1, 0)))
+        self.assertFalse(self.game.move_is_legal((0, 7)))
+        self.game.apply_move((2, 3))
+        self.assertFalse(self.game.move_is_legal((2, 3)))
+
+    def test_forecast_move_does_not_modify_board(self):
+        self.game.apply_move((2, 3))
+        self.game.apply_move((0, 5))
+        before = self.game.to_string()
+        new_game = self.game.forecast_move((4, 4))
+        self.assertEqual(self.game.to_string(), before)
+        self.assertEqual(new_game.get_player_location(self.player1), (4, 4))
+        self.assertEqual(self.game.get_player_location(self.player1), (2, 3))
+        self.assertIs(new_game.active_player, self.player2)
+
+    def test_undo_move_restores_state(self):
+        for game in self.play_random_games(7, 7, num_games=5):
+            moves = game.get_legal_moves()
+            if not moves:
+                continue
+            before = (game.to_string(), game.hash(), game.move_count,
+                      game.active_player, sorted(game.get_legal_moves()))
+            game.apply_move(moves[0])
+            game.undo_move()
+            self.assertEqual(before, (game.to_string(), game.hash(), game.move_count,
+                                      game.active_player, sorted(game.get_legal_moves())))
+
+    def test_undo_move_without_history(self):
+        self.assertRaises(RuntimeError, self.game.undo_move)
+        self.game.apply_move((2, 3))
+        self.assertRaises(RuntimeError, self.game.copy().undo_move)
+
+    def test_zobrist_matches_full_recomputation(self):
+        for game in self.play_random_games(7, 7, num_games=5):
+            geometry = game._geometry
+            key = geometry.zobrist_side if game._initiative else 0
+            for idx in range(geometry.size):
+                if game._blocked >> idx & 1:
+                    key ^= geometry.zobrist_blocked[idx]
+            for slot, idx in enumerate(game._locations):
+                if idx is not None:
+                    key ^= geometry.zobrist_location[slot][idx]
+            self.assertEqual(game.zobrist, key)
+            self.assertEqual(game.hash(), key)
+
+    def test_zobrist_undo_restores_key(self):
+        for move in [(2, 3), (0, 5), (4, 4)]:
+            self.game.apply_move(move)
+        key = self.game.hash()
+        self.game.apply_move((3, 2))
+        self.assertNotEqual(self.game.hash(), key)
+        self.game.undo_move()
+        self.assertEqual(self.game.hash(), key)
+
+    def test_seeded_boards_are_reproducible(self):
+        def move_orders(seed):
+            game = isolation.Board(self.player1, self.player2, seed=seed)
+            game.apply_move((3, 3))
+            game.apply_move((0, 0))
+            copy = game.copy()
+            return [game.get_legal_moves() for _ in range(5)] + [copy.get_legal_moves()]
+
+        self.assertEqual(move_orders(42), move_orders(42))
+        self.assertNotEqual(move_orders(42), move_orders(43))
+
+    def test_unshuffled_moves_are_stable(self):
+        game = isolation.Board(self.player1, self.player2, shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        moves = game.get_legal_moves()
+        self.assertEqual(moves, sorted(moves, key=lambda m: m[0] + m[1] * game.height))
+        self.assertEqual(game.copy().get_legal_moves(), moves)
+        self.assertEqual(game.get_legal_moves(self.player2), [(2, 1), (1, 2)])
+
+
+    def test_count_legal_moves_matches_list(self):
+        for game in self.play_random_games(7, 7, num_games=10):
+            p1_moves = len(game.get_legal_moves(self.player1))
+            p2_moves = len(game.get_legal_moves(self.player2))
+            self.assertEqual(game.count_legal_moves(self.player1), p1_moves)
+            self.assertEqual(game.count_legal_moves(self.player2), p2_moves)
+            self.assertEqual(game.count_mobility(self.player1), (p1_moves, p2_moves))
+            self.assertEqual(game.count_mobility(self.player2), (p2_moves, p1_moves))
+            self.assertEqual(game.count_legal_moves(), len(game.get_legal_moves()))
+
+
+    def test_memoized_moves_follow_state(self):
+        self.game.apply_move((0, 0))
+        self.game.apply_move((6, 6))
+        moves = self.game.get_legal_moves()
+        moves.append((3, 3))
+        self.assertEqual(sorted(self.game.get_legal_moves()), [(1, 2), (2, 1)])
+        self.game.apply_move((1, 2))
+        self.assertEqual(sorted(self.game.get_legal_moves()), [(4, 5), (5, 4)])
+        self.game.undo_move()
+        self.assertEqual(sorted(self.game.get_legal_moves()), [(1, 2), (2, 1)])
+        self.game._block_cell((1, 2))
+        self.game._block_cell((2, 1))
+        self.assertEqual(self.game.get_legal_moves(), [])
+        self.assertTrue(self.game.is_loser(self.player1))
+        self.assertTrue(self.game.is_winner(self.player2))
+        self.assertEqual(self.game.utility(self.player1), float("-inf"))
+
+
+    def test_snapshot_round_trip(self):
+        snapshots = set()
+        for game in self.play_random_games(5, 6, num_games=3):
+            snapshot = game.snapshot()
+            snapshots.add(snapshot)
+            restored = isolation.Board.from_snapshot(snapshot, self.player1, self.player2)
+            self.assertEqual(restored.snapshot(), snapshot)
+            self.assertEqual(restored.hash(), game.hash())
+            self.assertEqual(restored.to_string(), game.to_string())
+            self.assertIs(restored.active_player, game.active_player)
+            self.assertEqual(sorted(restored.get_legal_moves()), sorted(game.get_legal_moves()))
+        empty = isolation.Board(self.player2, self.player1, 5, 6)
+        self.assertIn(empty.snapshot(), snapshots)
+
+    def test_partition_detection_matches_reference(self):
+        for game in self.play_random_games(5, 5):
+            locations = [game.get_player_location(p) for p in (self.player1, self.player2)]
+            if None in locations:
+                self.assertFalse(game.is_partitioned())
+                continue
+            blank = set(game.get_blank_spaces())
+            regions = [reference_region(loc, blank) for loc in locations]
+            self.assertEqual(game.is_partitioned(), not regions[0] & regions[1])
+
+    def test_longest_path_matches_reference(self):
+        for game in self.play_random_games(5, 5, num_games=10):
+            blank = set(game.get_blank_spaces())
+            for player in (self.player1, self.player2):
+                loc = game.get_player_location(player)
+                if loc is None or len(reference_region(loc, blank)) > 12:
+                    continue
+                path = game.longest_path(player)
+                length = reference_longest_path(loc, reference_region(loc, blank))
+                self.assertEqual(len(path), length)
+                low, high = game.path_bounds(player)
+                self.assertLessEqual(low, length)
+                self.assertGreaterEqual(high, length)
+                unvisited = set(blank)
+                for move in path:
+                    self.assertIn((move[0] - loc[0], move[1] - loc[1]),
+                                  isolation.isolation.KNIGHT_DIRECTIONS)
+                    self.assertIn(move, unvisited)
+                    unvisited.remove(move)
+                    loc = move
+        self.assertRaises(RuntimeError, self.game.longest_path)
+
+    def test_reachable_areas_match_reference(self):
+        for game in self.play_random_games(7, 5, num_games=10):
+            active, inactive = game.active_player, game.inactive_player
+            locs = [game.get_player_location(p) for p in (active, inactive)]
+            if None in locs:
+                self.assertRaises(RuntimeError, game.reachable_areas)
+                continue
+            blank = game.get_blank_spaces()
+            for depth in (1, 2, None):
+                areas = reference_areas(locs, blank, depth)
+                self.assertEqual(game.reachable_areas(depth=depth), areas)
+                self.assertEqual(game.reachable_areas(inactive, depth), areas[::-1])
+
+    def test_canonical_form_is_shared_by_symmetric_positions(self):
+        rng = random.Random(17)
+        for width, height in [(7, 7), (5, 6)]:
+            empty = isolation.Board(self.player1, self.player2, width, height)
+            transforms = range(8 if width == height else 4)
+            self.assertEqual(empty.symmetries(), list(transforms))
+            for _ in range(5):
+                game, moves = isolation.Board(self.player1, self.player2, width, height), []
+                while game.get_legal_moves():
+                    key, transform = game.canonical()
+                    for t in transforms:
+                        image = isolation.Board(self.player1, self.player2, width, height)
+                        for move in moves:
+                            image.apply_move(empty.transform_move(move, t))
+                        self.assertEqual(image.canonical()[0], key)
+                        self.assertEqual(sorted(image.get_legal_moves()),
+                                         sorted(empty.transform_move(move, t)
+                                                for move in game.get_legal_moves()))
+                    for move in game.get_blank_spaces():
+                        self.assertEqual(game.transform_move(game.transform_move(move, transform),
+                                                             transform, inverse=True), move)
+                    moves.append(rng.choice(game.get_legal_moves()))
+                    game.apply_move(moves[-1])
+
+    def test_board_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.game, "__dict__"))
+        self.assertFalse(hasattr(self.game.copy(), "__dict__"))
+
+
+if __name__ == '__main__':
+    unittest.main()
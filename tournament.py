@@ -26,6 +26,7 @@ from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
 # NUM_MATCHES = 3  # number of matches against each opponent
 NUM_MATCHES = 10
 TIME_LIMIT = 150  # number of milliseconds before timeout
+RANDOM_SEED = None  # set to an int to make the openings and boards reproducible
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
@@ -38,24 +39,27 @@ game_agent.py.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_round(cpu_agent, test_agents, win_counts, num_matches, rng=random):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    The openings and the seed of every board are drawn from rng, so a seeded
+    `random.Random` makes the whole round reproducible.
     """
     timeout_count = 0
     forfeit_count = 0
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
+        games = sum([[Board(cpu_agent.player, agent.player, seed=rng.getrandbits(64)),
+                      Board(agent.player, cpu_agent.player, seed=rng.getrandbits(64))]
                     for agent in test_agents], [])
 
         # initialize all games with a random move and response
         for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
+            move = rng.choice(games[0].get_legal_moves())
             for game in games:
                 game.apply_move(move)
 
@@ -78,12 +82,50 @@ def update(total_wins, wins):
     return total_wins
 
 
+def collect_stats(agents):
+    """Make every agent that reports search statistics append the
+    `SearchStats` of each of its moves to a list, and return the lists by
+    player.
+    """
+    stats = {}
+    for agent in agents:
+        if hasattr(agent.player, "stats_callback"):
+            stats[agent.player] = []
+            agent.player.stats_callback = lambda player, move_stats: stats[player].append(move_stats)
+    return stats
+
+
+def print_stats(agents, stats):
+    """Print the search statistics of each agent, averaged over its moves."""
+    print("\n{:^13}{:>8}{:>12}{:>12}{:>10}{:>8}{:>10}{:>11}".format(
+        "Agent", "Moves", "Nodes/move", "Leaves/move", "Nodes/s", "Depth",
+        "Cutoffs", "Min left"))
+    for agent in agents:
+        moves = stats.get(agent.player)
+        if not moves:
+            continue
+        searched = [s for s in moves if s.nps > 0]
+        nodes = sum(s.nodes for s in searched)
+        seconds = sum(s.nodes / s.nps for s in searched)
+        depths = [s.depth for s in moves if s.depth > 0]
+        print("{:^13}{:>8}{:>12.0f}{:>12.0f}{:>10.0f}{:>8.2f}{:>10.0f}{:>11.1f}".format(
+            agent.name, len(moves),
+            sum(s.nodes for s in moves) / len(moves),
+            sum(s.leaves for s in moves) / len(moves),
+            nodes / seconds if seconds else 0.,
+            sum(depths) / len(depths) if depths else 0.,
+            sum(s.cutoffs for s in moves) / len(moves),
+            min(s.time_left for s in moves)))
+
+
 def play_matches(cpu_agents, test_agents, num_matches):
     """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
+    stats = collect_stats(test_agents)
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
+    rng = random.Random(RANDOM_SEED)
 
     print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
     print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
@@ -94,7 +136,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, rng)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -114,6 +156,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
                 "{:.1f}%".format(100 * total_wins[x[1].player] / total_matches)
             ) for x in enumerate(test_agents)
     ]))
+    print_stats(test_agents, stats)
 
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
@@ -20,7 +20,7 @@ from collections import namedtuple
 from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
-from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, FeatureEvaluator, custom_score,
                         custom_score_2, custom_score_3)
 
 #NUM_MATCHES = 5  # number of matches against each opponent
@@ -132,7 +132,8 @@ def main():
     # starting position against the same adversaries in the tournament
     test_agents = [
         # Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
+        # Weights suggested by spear.py, read from params.txt
+        Agent(AlphaBetaPlayer(score_fn=FeatureEvaluator.from_file()), "AB_Custom"),
         # Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
         # Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
     ]